@@ -1,17 +1,36 @@
 import sys
 import os
+import argparse
 import webbrowser
 import wave
 import tempfile
 import shutil
-from pydub import AudioSegment
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from PyQt6.QtWidgets import QApplication, QMainWindow, QFileDialog, QTreeWidgetItem, QDialog, QMessageBox, QAbstractItemView, QMessageBox, QMenu
-from PyQt6.QtCore import QFileInfo, QObject, QThread, pyqtSignal, Qt, QMimeData
-from PyQt6.QtGui import QAction
+from PyQt6.QtWidgets import QApplication, QMainWindow, QFileDialog, QTreeWidgetItem, QDialog, QMessageBox, QAbstractItemView, QMessageBox, QMenu, QInputDialog, QStyledItemDelegate, QStyle
+from PyQt6.QtCore import QFileInfo, QObject, QThread, pyqtSignal, Qt, QMimeData, QTimer
+from PyQt6.QtGui import QAction, QActionGroup, QColor
 from mat import Ui_MainWindow
 from mat_about import Ui_About_Dialog
 from mat_progressbar import Ui_Dialog
+from mat_scheduler import Job, JobQueue, ResourceSampler, estimate_cost, estimate_memory, default_memory_budget, POLICY_AUTO, POLICIES, POLICY_NAMES
+from mat_convert import MAYA_PROFILE, PROFILES
+from mat_jobs import build_job_spec, run_job_spec
+from mat_ingest import gather_file_metadata, refresh_file_metadata, build_waveform_preview, new_file_meta, MAX_IN_FLIGHT, PREVIEW_WORKERS
+from mat_archive import is_archive, list_media_members, member_basename, reads_from_start, ArchiveError
+from mat_wavwriter import LARGE_FILE_RF64, LARGE_FILE_MODES, LARGE_FILE_MODE_NAMES
+from mat_session import write_session, SessionReader, SessionError
+from mat_cues import Cue, load_cue_file, cue_span, CueError
+from mat_loudness import LOUDNESS_TARGETS, format_loudness
+from mat_waveform import WaveformPyramid, prune_cache, cache_path as waveform_cache_path
+from mat_profiling import profiler, default_report_path, PHASE_INGEST, PHASE_CONVERT, PHASE_DOWNLOAD
+from mat_timecode import parse_range, format_range, format_timecode, TimecodeError
+
+# How often the memory and CPU use of a running batch are measured
+RESOURCE_SAMPLE_INTERVAL_MS = 1000
+
+# Rows built per event loop turn when a session is opened
+SESSION_CHUNK_SIZE = 2000
 
 # Load HTML content from files
 HTML_DIR = os.path.join(os.path.dirname(__file__), 'assets')
@@ -24,6 +43,14 @@ def load_html_file(self, filename):
     with open(file_path, 'r', encoding='utf-8') as f:
         return f.read()  # Return the file content
 
+def is_inside_folder(path, folder):
+    # Items restored from a session convert straight from the source file,
+    # which must never be deleted like a temp copy.
+    try:
+        return os.path.commonpath([os.path.abspath(path), os.path.abspath(folder)]) == os.path.abspath(folder)
+    except ValueError:
+        return False
+
 class AboutDialog(QDialog, Ui_About_Dialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -59,76 +86,158 @@ class ProgressDialog(QDialog, Ui_Dialog):
         self.setWindowTitle("Converting Files...")
         self.setModal(True)
 
+class WaveformDelegate(QStyledItemDelegate):
+    # Draws the cached min/max overview of an item; the pyramid level is
+    # picked from the column width, so resizing never touches the audio.
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        waveform = index.data(Qt.ItemDataRole.UserRole)
+        if isinstance(waveform, str):
+            # A cache path that has not been read yet
+            waveform = WaveformPyramid.load(waveform)
+            index.model().setData(index, waveform, Qt.ItemDataRole.UserRole)
+        if waveform is None:
+            return
+
+        rect = option.rect.adjusted(2, 2, -2, -2)
+        middle = rect.top() + rect.height() / 2
+        half_height = rect.height() / 2
+        if option.state & QStyle.StateFlag.State_Selected:
+            color = option.palette.highlightedText().color()
+        else:
+            color = QColor(0, 85, 255)
+
+        painter.save()
+        painter.setPen(color)
+        for x, (low, high) in enumerate(waveform.columns(rect.width())):
+            top = int(middle - high / 127 * half_height)
+            bottom = int(middle - low / 127 * half_height)
+            painter.drawLine(rect.left() + x, top, rect.left() + x, bottom)
+        painter.restore()
+
+class MetadataLoader(QObject):
+    # Gathers file metadata on a thread pool. The signal is emitted from the
+    # pool threads and delivered on the GUI thread, which owns the items.
+    file_loaded = pyqtSignal(object, object) # QTreeWidgetItem, metadata dict
+    waveform_ready = pyqtSignal(object, object) # QTreeWidgetItem, overview cache path
+
+    def __init__(self, temp_dir, max_in_flight=MAX_IN_FLIGHT):
+        super().__init__()
+        self.temp_dir = temp_dir
+        # The pool size bounds the I/O in flight; the rest waits in its queue
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="mat-metadata")
+        # Overviews are decodes; they queue behind each other, not the metadata
+        self.preview_executor = ThreadPoolExecutor(max_workers=PREVIEW_WORKERS, thread_name_prefix="mat-preview")
+        self.preview_futures = set()
+
+    def load(self, item, file_path, member=None):
+        future = self.executor.submit(profiler.call, PHASE_INGEST, gather_file_metadata, file_path, self.temp_dir, member)
+        future.add_done_callback(lambda future, item=item: self.emit_file_loaded(item, future, new_file_meta(file_path, member)))
+
+    def refresh(self, item, file_meta):
+        future = self.executor.submit(profiler.call, PHASE_INGEST, refresh_file_metadata, file_meta, self.temp_dir)
+        future.add_done_callback(lambda future, item=item: self.emit_file_loaded(item, future, dict(file_meta, temp_path=None)))
+
+    def emit_file_loaded(self, item, future, fallback_meta):
+        # Every row has to hear back, or it blocks conversion forever; an
+        # unexpected failure becomes the row's error instead.
+        if future.cancelled():
+            return  # Only on shutdown
+        error = future.exception()
+        if error is None:
+            self.file_loaded.emit(item, future.result())
+        else:
+            self.file_loaded.emit(item, dict(fallback_meta, error=f"Unexpected error: {error}"))
+
+    def build_preview(self, item, file_meta):
+        future = self.preview_executor.submit(profiler.call, PHASE_INGEST, build_waveform_preview, file_meta)
+        self.preview_futures.add(future)
+        future.add_done_callback(lambda future, item=item: self.emit_waveform_ready(item, future))
+
+    def emit_waveform_ready(self, item, future):
+        self.preview_futures.discard(future)
+        waveform_path = None
+        if not future.cancelled() and future.exception() is None:
+            waveform_path = future.result()
+        # Also sent without an overview, so the window can forget the row
+        self.waveform_ready.emit(item, waveform_path)
+
+    def cancel_previews(self):
+        # Queued overviews of rows that were cleared away are not built
+        for future in list(self.preview_futures):
+            future.cancel()
+
+    def prune_waveform_cache(self):
+        self.executor.submit(prune_cache)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.preview_executor.shutdown(wait=False, cancel_futures=True)
+
+def show_loudness_stats(item, stats):
+    loudness = format_loudness(stats["integrated"], "LUFS")
+    if stats["gain"]:
+        loudness += f" ({stats['gain']:+.1f} dB)"
+    item.setText(9, loudness)
+    item.setText(10, format_loudness(stats["true_peak"], "dBTP"))
+    clipped = stats["clipped_samples"]
+    item.setText(11, f"{clipped} samples" if clipped else "None")
+
 class ConvertWorker(QObject):
-    # Signals to communicate with the main UI thread
+    # Signals to communicate with the main UI thread. Workers never touch the
+    # tree items; results go to the GUI thread through file_converted.
     progress_updated = pyqtSignal(int)
     finished = pyqtSignal()
-    file_converted = pyqtSignal(object) # object is a QTreeWidgetItem
+    file_converted = pyqtSignal(object, object) # QTreeWidgetItem, result dict
 
-    def __init__(self, items, temp_dir):
+    def __init__(self, job_queue, temp_dir):
         super().__init__()
-        self.items = items
+        self.job_queue = job_queue
         self.temp_dir = temp_dir
 
     def run(self):
-        converted_count = 0
-        total_items = len(self.items)
-
-        for item in self.items:
-            try:
-                is_converted = item.data(1, Qt.ItemDataRole.UserRole)
-                if is_converted:
-                    converted_count += 1
-                    self.progress_updated.emit(converted_count)
-                    continue
-
-                temp_file_path = item.data(0, Qt.ItemDataRole.UserRole)
-                audio = AudioSegment.from_file(temp_file_path)
-                converted_audio = audio.set_frame_rate(44100).set_sample_width(2).set_channels(2)
-                output_file_name = os.path.splitext(os.path.basename(temp_file_path))[0] + ".wav"
-                output_path = os.path.join(self.temp_dir, output_file_name)
-                converted_audio.export(output_path, format="wav")
-
-                os.remove(temp_file_path)
-                item.setData(0, Qt.ItemDataRole.UserRole, output_path)
-                item.setData(1, Qt.ItemDataRole.UserRole, True)
-
-                # Re-check the WAV properties of the newly converted file
-                support_maya_status = "No"
-                try:
-                    with wave.open(output_path, 'r') as w:
-                        nchannels = w.getnchannels()
-                        sampwidth = w.getsampwidth()
-                        framerate = w.getframerate()
-                        if framerate == 44100 and (sampwidth * 8) == 16 and nchannels == 2:
-                            support_maya_status = "Yes"
-                except (wave.Error, FileNotFoundError):
-                    support_maya_status = "N/A"
-
-                # Update the TreeWidget item with the new converted file's info
-                item.setText(1, os.path.basename(output_path))
-                item.setText(2, datetime.fromtimestamp(os.path.getmtime(output_path)).strftime('%Y-%m-%d %H:%M:%S'))
-                item.setText(3, "wav")
-                new_file_size = os.path.getsize(output_path)
-                item.setText(4, f"{new_file_size / (1024 * 1024):.2f} MB")
-                item.setText(5, support_maya_status)
-                item.setText(6, "Complete")
-                item.setText(7, "OK")
-
-                converted_count += 1
-                self.progress_updated.emit(converted_count)
-
-            except Exception as e:
-                print(f"Failed to convert: {e}")
-                item.setText(6, "Error")
-                item.setText(7, "Failed")
-                converted_count += 1
-                self.progress_updated.emit(converted_count)
+        # Several workers share one queue; each takes the next job when it is idle.
+        while True:
+            job = self.job_queue.next_job()
+            if job is None:
+                break
+            if job.spec is not None:
+                self.file_converted.emit(job.item, self.convert(job.spec))
+            self.progress_updated.emit(self.job_queue.mark_done(job))
 
         self.finished.emit()
 
+    def convert(self, spec):
+        # Everything that reads or writes files; the GUI thread only displays the result.
+        result = {"output_paths": [], "stats": None, "warning": None, "supports_maya": "N/A",
+                  "mtime": None, "size": None, "error": None}
+        try:
+            with profiler.phase(PHASE_CONVERT):
+                result.update(run_job_spec(spec))
+            input_path = spec["input_path"]
+            output_path = result["output_paths"][0]
+            if input_path not in result["output_paths"] and is_inside_folder(input_path, self.temp_dir):
+                os.remove(input_path)
+
+            # Re-check the WAV properties of the newly converted file
+            try:
+                with wave.open(output_path, 'r') as w:
+                    nchannels = w.getnchannels()
+                    sampwidth = w.getsampwidth()
+                    framerate = w.getframerate()
+                    maya_ready = framerate == 44100 and (sampwidth * 8) == 16 and nchannels == 2
+                    result["supports_maya"] = "Yes" if maya_ready else "No"
+            except (wave.Error, FileNotFoundError):
+                result["supports_maya"] = "N/A"
+            result["mtime"] = os.path.getmtime(output_path)
+            result["size"] = os.path.getsize(output_path)
+        except Exception as e:
+            print(f"Failed to convert: {e}")
+            result["error"] = str(e)
+        return result
+
 class MatMainWindow(QMainWindow, Ui_MainWindow):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, profile_report_path=None):
         super().__init__(parent)
         self.setupUi(self)
         self.showMaximized()
@@ -141,11 +250,46 @@ class MatMainWindow(QMainWindow, Ui_MainWindow):
 
         # Create a temporary directory to store files
         self.temp_dir = tempfile.mkdtemp()
+
+        # Added files are read in the background; rows waiting for their metadata
+        self.metadata_loader = MetadataLoader(self.temp_dir)
+        self.metadata_loader.file_loaded.connect(self.on_file_metadata_loaded)
+        self.metadata_loader.waveform_ready.connect(self.on_waveform_ready)
+        self.metadata_loader.prune_waveform_cache()
+        self.loading_items = {}
+        # Rows waiting for their overview; results for other rows are dropped
+        self.preview_items = {}
+
+        # Conversion runs on several workers; the scheduler decides the order.
+        self.worker_count = max(1, min(4, os.cpu_count() or 1))
+        self.schedule_policy = POLICY_AUTO
+        # Extra deliverables written next to the Maya WAV from the same decode
+        self.extra_profiles = []
+        # Loudness normalization target in LUFS, None when off
+        self.loudness_target = None
+        self.large_file_mode = LARGE_FILE_RF64
+        # Estimated peak memory allowed for the conversions running at once
+        self.memory_budget = default_memory_budget()
+        self.resource_timer = QTimer(self)
+        self.resource_timer.setInterval(RESOURCE_SAMPLE_INTERVAL_MS)
+        self.resource_timer.timeout.connect(self.adapt_concurrency)
+        self.threads = []
+        self.workers = []
+        self.setup_session_menu()
+        self.setup_schedule_menu()
+        self.setup_profile_menu()
+        self.setup_loudness_menu()
+        self.setup_large_output_menu()
+        self.setup_memory_budget_action()
+        self.setup_profiling_action(profile_report_path)
+        self.setup_extra_columns()
+
         self.connect_signals()
         self.treeWidget.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
 
     def __del__(self):
         # Clean up the temporary directory when the application closes
+        self.metadata_loader.shutdown()
         shutil.rmtree(self.temp_dir, ignore_errors=True)
 
     def connect_signals(self):
@@ -173,6 +317,152 @@ class MatMainWindow(QMainWindow, Ui_MainWindow):
         self.actionJoin_in_Discord_Server.triggered.connect(self.join_discord_server)
         self.actionAbout.triggered.connect(self.about_mat)
 
+    def setup_profiling_action(self, report_path=None):
+        # Help > Profiling Mode records where a batch spends its time and memory.
+        # With --profile the report is written on exit instead of asked for.
+        self.profile_report_path = report_path
+        self.actionProfiling_Mode = QAction("&Profiling Mode", self, checkable=True)
+        self.actionProfiling_Mode.setChecked(profiler.running)
+        self.actionProfiling_Mode.toggled.connect(self.set_profiling_mode)
+        self.menu_Help.insertAction(self.actionAbout, self.actionProfiling_Mode)
+        self.menu_Help.insertSeparator(self.actionAbout)
+
+    def set_profiling_mode(self, enabled):
+        if enabled:
+            profiler.start()
+            return
+
+        profiler.stop()
+        report_path = self.profile_report_path
+        self.profile_report_path = None
+        if report_path is None:
+            report_path, _ = QFileDialog.getSaveFileName(self, "Save Profiling Report", default_report_path(),
+                                                         "Text Files (*.txt)")
+        if report_path:
+            self.write_profiling_report(report_path)
+
+    def write_profiling_report(self, report_path):
+        try:
+            profiler.write_report(report_path)
+            print(f"Profiling report written to {report_path}")
+        except OSError as e:
+            QMessageBox.critical(self, "Profiling Report Error", f"Failed to write the report.\nError: {e}")
+
+    def closeEvent(self, event):
+        # A profile started from the command line is saved when MAT closes
+        if profiler.running and self.profile_report_path:
+            profiler.stop()
+            self.write_profiling_report(self.profile_report_path)
+        super().closeEvent(event)
+
+    def setup_session_menu(self):
+        # File > Open/Save Session keeps a whole list, with its metadata, between runs.
+        self.actionOpen_Session = QAction("&Open Session...", self)
+        self.actionOpen_Session.setShortcut("Ctrl+O")
+        self.actionSave_Session = QAction("Sa&ve Session...", self)
+        self.actionSave_Session.setShortcut("Ctrl+Alt+S")
+        self.actionOpen_Session.triggered.connect(self.open_session)
+        self.actionSave_Session.triggered.connect(self.save_session)
+        self.menuFile.insertAction(self.actionExit, self.actionOpen_Session)
+        self.menuFile.insertAction(self.actionExit, self.actionSave_Session)
+        self.menuFile.insertSeparator(self.actionExit)
+        self.session_reader = None
+        self.session_next_index = 0
+        # Restored rows whose source has not been checked yet. Only rows that
+        # are scrolled into view are checked; a conversion reads the source anyway.
+        self.unchecked_items = {}
+        self.treeWidget.verticalScrollBar().valueChanged.connect(self.refresh_visible_rows)
+
+    def setup_schedule_menu(self):
+        # Edit > Schedule lets the user pick the order in which files are converted.
+        self.menuSchedule = QMenu("Sc&hedule", self)
+        self.schedule_action_group = QActionGroup(self)
+        for policy in [POLICY_AUTO] + POLICIES:
+            action = QAction(POLICY_NAMES[policy], self, checkable=True)
+            action.setChecked(policy == self.schedule_policy)
+            action.triggered.connect(lambda checked, policy=policy: self.set_schedule_policy(policy))
+            self.schedule_action_group.addAction(action)
+            self.menuSchedule.addAction(action)
+        self.menuEdit.insertMenu(self.actionConvert_Selection, self.menuSchedule)
+
+    def set_schedule_policy(self, policy):
+        self.schedule_policy = policy
+
+    def setup_profile_menu(self):
+        # Edit > Output Profiles adds deliverables on top of the Maya WAV.
+        self.menuProfiles = QMenu("Output &Profiles", self)
+        for profile in PROFILES:
+            action = QAction(profile.name, self, checkable=True)
+            if profile is MAYA_PROFILE:
+                # The Maya WAV is always written
+                action.setChecked(True)
+                action.setEnabled(False)
+            else:
+                action.triggered.connect(lambda checked, profile=profile: self.set_profile_enabled(profile, checked))
+            self.menuProfiles.addAction(action)
+        self.menuEdit.insertMenu(self.actionConvert_Selection, self.menuProfiles)
+
+    def set_profile_enabled(self, profile, enabled):
+        if enabled and profile not in self.extra_profiles:
+            self.extra_profiles.append(profile)
+        elif not enabled and profile in self.extra_profiles:
+            self.extra_profiles.remove(profile)
+
+    def setup_loudness_menu(self):
+        # Edit > Loudness Normalization is applied during conversion, without a second decode.
+        self.menuLoudness = QMenu("&Loudness Normalization", self)
+        self.loudness_action_group = QActionGroup(self)
+        for name, target in [("Off", None)] + LOUDNESS_TARGETS:
+            action = QAction(name, self, checkable=True)
+            action.setChecked(target == self.loudness_target)
+            action.triggered.connect(lambda checked, target=target: self.set_loudness_target(target))
+            self.loudness_action_group.addAction(action)
+            self.menuLoudness.addAction(action)
+        self.menuEdit.insertMenu(self.actionConvert_Selection, self.menuLoudness)
+
+    def set_loudness_target(self, target):
+        self.loudness_target = target
+
+    def setup_large_output_menu(self):
+        # Edit > Outputs Over 4 GB picks between one RF64 file and numbered WAV parts.
+        self.menuLarge_Outputs = QMenu("Outputs Over &4 GB", self)
+        self.large_file_action_group = QActionGroup(self)
+        for mode in LARGE_FILE_MODES:
+            action = QAction(LARGE_FILE_MODE_NAMES[mode], self, checkable=True)
+            action.setChecked(mode == self.large_file_mode)
+            action.triggered.connect(lambda checked, mode=mode: self.set_large_file_mode(mode))
+            self.large_file_action_group.addAction(action)
+            self.menuLarge_Outputs.addAction(action)
+        self.menuEdit.insertMenu(self.actionConvert_Selection, self.menuLarge_Outputs)
+
+    def set_large_file_mode(self, mode):
+        self.large_file_mode = mode
+
+    def setup_memory_budget_action(self):
+        self.actionMemory_Budget = QAction("&Memory Budget...", self)
+        self.actionMemory_Budget.triggered.connect(self.set_memory_budget)
+        self.menuEdit.insertAction(self.actionConvert_Selection, self.actionMemory_Budget)
+        self.menuEdit.insertSeparator(self.actionConvert_Selection)
+
+    def set_memory_budget(self):
+        megabytes, ok = QInputDialog.getInt(self, "Memory Budget",
+                                            "Memory the conversions may use at once (MB):",
+                                            self.memory_budget // (1024 * 1024), 256, 1024 * 1024)
+        if ok:
+            self.memory_budget = megabytes * 1024 * 1024
+
+    def setup_extra_columns(self):
+        # Columns added on top of the ones defined in mat.ui
+        self.treeWidget.setColumnCount(13)
+        self.treeWidget.headerItem().setText(8, "Range")
+        self.treeWidget.headerItem().setText(9, "Loudness")
+        self.treeWidget.headerItem().setText(10, "True Peak")
+        self.treeWidget.headerItem().setText(11, "Clipping")
+        self.treeWidget.headerItem().setText(12, "Waveform")
+        self.treeWidget.setColumnWidth(12, 200)
+        self.waveform_delegate = WaveformDelegate(self.treeWidget)
+        self.treeWidget.setItemDelegateForColumn(12, self.waveform_delegate)
+
     def dragEnterEvent(self, event):
         # This method is called when a drag operation enters the widget
         if event.mimeData().hasUrls():
@@ -198,6 +488,10 @@ class MatMainWindow(QMainWindow, Ui_MainWindow):
         clear_action = QAction("Clear", self)
         convert_selection_action = QAction("Convert Selection", self)
         convert_all_action = QAction("Convert All", self)
+        range_action = QAction("Set Range...", self)
+        cue_action = QAction("Load Cue List...", self)
+        pin_action = QAction("Pin Priority", self)
+        unpin_action = QAction("Unpin Priority", self)
         download_action = QAction("Download", self)
     
         # Connect actions to your existing functions
@@ -206,6 +500,10 @@ class MatMainWindow(QMainWindow, Ui_MainWindow):
         clear_action.triggered.connect(self.clear_list)
         convert_selection_action.triggered.connect(self.convert_selection)
         convert_all_action.triggered.connect(self.convert_all)
+        range_action.triggered.connect(self.set_selection_range)
+        cue_action.triggered.connect(self.load_selection_cues)
+        pin_action.triggered.connect(lambda: self.set_selection_pinned(True))
+        unpin_action.triggered.connect(lambda: self.set_selection_pinned(False))
         download_action.triggered.connect(self.download_files)
     
         # Add actions to the menu
@@ -215,18 +513,122 @@ class MatMainWindow(QMainWindow, Ui_MainWindow):
         menu.addSeparator() # Adds a line to separate groups
         menu.addAction(convert_selection_action)
         menu.addAction(convert_all_action)
+        menu.addAction(range_action)
+        menu.addAction(cue_action)
+        menu.addAction(pin_action)
+        menu.addAction(unpin_action)
         menu.addSeparator()
         menu.addAction(download_action)
     
         # Show the menu at the cursor's position
         menu.exec(self.treeWidget.mapToGlobal(pos))
 
+    def set_selection_pinned(self, pinned):
+        # Pinned items are converted before everything else, whatever the schedule policy.
+        for item in self.treeWidget.selectedItems():
+            item.setData(3, Qt.ItemDataRole.UserRole, pinned)
+            font = item.font(1)
+            font.setBold(pinned)
+            item.setFont(1, font)
+
+    def set_selection_range(self):
+        selected_items = self.treeWidget.selectedItems()
+
+        if not selected_items:
+            QMessageBox.information(self, "No Selection", "Please select one or more items to set a range for.")
+            return
+
+        current_range = selected_items[0].data(4, Qt.ItemDataRole.UserRole)
+        current_text = ""
+        if current_range:
+            start, end = current_range
+            current_text = f"{format_timecode(start)}-{format_timecode(end) if end is not None else ''}"
+
+        # Only the range is decoded, so a short clip of a long video converts quickly.
+        text, ok = QInputDialog.getText(
+            self,
+            "Set Range",
+            "In - Out (e.g. 00:01:10.5-00:01:30, 00:01:10:12-00:01:30:00@24, 1680-2160@24).\n"
+            "Leave empty to convert the whole file.",
+            text=current_text
+        )
+        if not ok:
+            return
+
+        clip_range = None
+        if text.strip():
+            try:
+                clip_range = parse_range(text)
+            except TimecodeError as e:
+                QMessageBox.warning(self, "Invalid Range", str(e))
+                return
+
+        for item in selected_items:
+            if item.data(1, Qt.ItemDataRole.UserRole):
+                # The range applies to the source, which is gone once converted
+                continue
+            item.setData(4, Qt.ItemDataRole.UserRole, clip_range)
+            item.setData(7, Qt.ItemDataRole.UserRole, None)  # A range replaces a cue list
+            item.setText(8, format_range(clip_range))
+            # The overview follows the range; it is built again on conversion
+            self.load_cached_waveform(item)
+
+    def load_selection_cues(self):
+        selected_items = [item for item in self.treeWidget.selectedItems() if not item.data(1, Qt.ItemDataRole.UserRole)]
+
+        if len(selected_items) != 1:
+            QMessageBox.information(self, "No Selection", "Please select one item that has not been converted yet.")
+            return
+        item = selected_items[0]
+
+        cue_file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Select a cue list",
+            filter="Cue Lists (*.csv *.edl);;CSV Files (*.csv);;EDL Files (*.edl)"
+        )
+        if not cue_file_path:
+            return
+
+        fps, ok = QInputDialog.getDouble(self, "Cue List", "Frame rate of the cue list:", 24.0, 1.0, 240.0, 3)
+        if not ok:
+            return
+
+        start_timecode = None
+        if cue_file_path.lower().endswith(".edl"):
+            # EDL source timecodes usually start at the hour, not at zero
+            start_timecode, ok = QInputDialog.getText(self, "Cue List", "Timecode of the first sample of the file:", text="00:00:00:00")
+            if not ok:
+                return
+
+        source_name = os.path.splitext(item.text(1))[0]
+        try:
+            cues = load_cue_file(cue_file_path, fps, start_timecode, source_name)
+        except (OSError, CueError, TimecodeError) as e:
+            QMessageBox.warning(self, "Invalid Cue List", str(e))
+            return
+
+        item.setData(7, Qt.ItemDataRole.UserRole, cues)
+        item.setData(4, Qt.ItemDataRole.UserRole, None)  # The cues replace a range
+        item.setText(8, f"Cue List ({len(cues)} shots)")
+        self.load_cached_waveform(item)
+
+    def load_cached_waveform(self, item):
+        # Only the cache path is stored; the delegate reads it when the row is first drawn
+        file_meta = item.data(2, Qt.ItemDataRole.UserRole)
+        waveform_path = waveform_cache_path(file_meta, item.data(4, Qt.ItemDataRole.UserRole))
+        if waveform_path and not os.path.exists(waveform_path):
+            # A range that has not been converted yet shows the whole file
+            waveform_path = waveform_cache_path(file_meta)
+        item.setData(12, Qt.ItemDataRole.UserRole, waveform_path)
+
     # add files with button.
     def add_files(self):
         add_files_filter = (
-            "All Media Files (*.mp4 *.avi *.mkv *.mov *.wmv *.flv *.webm *.mp3 *.wav *.flac *.aac *.m4a *.ogg *.aiff);;"
+            "All Media Files (*.mp4 *.avi *.mkv *.mov *.wmv *.flv *.webm *.mp3 *.wav *.flac *.aac *.m4a *.ogg *.aiff "
+            "*.zip *.tar *.tar.gz *.tgz *.tar.bz2 *.tbz2 *.tar.xz *.txz);;"
             "Video Files (*.mp4 *.avi *.mkv *.mov *.wmv *.flv *.webm);;"
-            "Audio Files (*.mp3 *.wav *.flac *.aac *.m4a *.ogg *.aiff)"
+            "Audio Files (*.mp3 *.wav *.flac *.aac *.m4a *.ogg *.aiff);;"
+            "Archives (*.zip *.tar *.tar.gz *.tgz *.tar.bz2 *.tbz2 *.tar.xz *.txz)"
         )
         filenames, _ = QFileDialog.getOpenFileNames(
             self,
@@ -236,79 +638,117 @@ class MatMainWindow(QMainWindow, Ui_MainWindow):
         for file_path in filenames:
             self.add_file_to_treewidget(file_path)
 
-    def add_file_to_treewidget(self, file_path):
+    def add_archive_to_treewidget(self, archive_path):
+        # Each media file in the archive becomes an item that is read from the
+        # archive. The index is read once here; the items carry their entry.
+        try:
+            members = list_media_members(archive_path)
+        except ArchiveError as e:
+            QMessageBox.warning(self, "Archive Error", str(e))
+            return
+        if not members:
+            QMessageBox.information(self, "Empty Archive", f"No media files were found in '{os.path.basename(archive_path)}'.")
+            return
+        for member_path, member in members:
+            self.add_file_to_treewidget(member_path, member)
+        if len(members) > 1 and reads_from_start(members[0][0]):
+            # Each conversion decompresses the archive up to its member again
+            self.statusBar().showMessage(
+                f"'{os.path.basename(archive_path)}' is a compressed tar: converting each file reads the archive "
+                "from its start, and no previews are drawn. Extract it first for a faster batch.")
+
+    def add_file_to_treewidget(self, file_path, member=None):
+        if is_archive(file_path):
+            self.add_archive_to_treewidget(file_path)
+            return
+
         # Check for duplicate file names
-        file_name = os.path.basename(file_path)
+        file_name = member_basename(file_path)
         for i in range(self.treeWidget.topLevelItemCount()):
             item = self.treeWidget.topLevelItem(i)
             if item.text(1) == file_name:
                 QMessageBox.warning(self, "Duplicate File", f"The file '{file_name}' already exists in the list.")
                 return
 
-        # Copy the file to the temporary directory
-        temp_file_path = os.path.join(self.temp_dir, os.path.basename(file_path))
-        shutil.copy(file_path, temp_file_path)
-
-        # Initialize all variables with default values
-        file_name = "N/A"
-        file_date_modified = "N/A"
-        file_type = "N/A"
-        file_size = "N/A"
-        support_maya_status = "No"
-        convert_progress = "N/A"
-        convert_status = "N/A"
-
         # Get the number of items already in the tree.
         current_item_count = self.treeWidget.topLevelItemCount()
         new_item_number = current_item_count + 1
 
-        try:
-            # Get the file information. This section is robustly handled by a try-except block.
-            file_name = os.path.basename(file_path)
-            file_type = os.path.splitext(file_path)[1][1:].lower()
+        # The row appears straight away as a placeholder; stat, copy and
+        # header read run on the metadata loader and fill it in later.
+        item = QTreeWidgetItem(self.treeWidget)
+        item.setText(0, str(new_item_number))
+        item.setText(1, file_name)
+        item.setText(2, "Loading...")
+        item.setText(3, os.path.splitext(file_path)[1][1:].lower())
+        item.setText(4, "Loading...")
+        item.setText(5, "Loading...")
+        item.setText(6, "N/A")
+        item.setText(7, "Loading")
+
+        item.setData(0, Qt.ItemDataRole.UserRole, None)
+        item.setData(1, Qt.ItemDataRole.UserRole, False)
+        item.setData(2, Qt.ItemDataRole.UserRole, new_file_meta(file_path, member))
+        item.setData(3, Qt.ItemDataRole.UserRole, False)
+        item.setData(4, Qt.ItemDataRole.UserRole, None)
+        item.setData(5, Qt.ItemDataRole.UserRole, [])
+        item.setData(6, Qt.ItemDataRole.UserRole, None)
+        item.setData(7, Qt.ItemDataRole.UserRole, None)
+        item.setText(8, format_range(None))
+        item.setText(9, "N/A")
+        item.setText(10, "N/A")
+        item.setText(11, "N/A")
 
-            # Get modification time
-            mod_timestamp = os.path.getmtime(file_path)
-            file_date_modified = datetime.fromtimestamp(mod_timestamp).strftime('%Y-%m-%d %H:%M %p')
+        # Add the item to the tree widget
+        self.treeWidget.addTopLevelItem(item)
 
-            # Get file size
-            file_size_bytes = os.path.getsize(file_path)
-            file_size = f"{file_size_bytes / (1024 * 1024):.2f} MB"
+        self.loading_items[id(item)] = item
+        self.metadata_loader.load(item, file_path, member)
 
-            # Check if the file is a WAV and meets specific criteria
-            if file_type == 'wav':
-                with wave.open(file_path, 'r') as w:
-                    nchannels = w.getnchannels()
-                    sampwidth = w.getsampwidth()
-                    framerate = w.getframerate()
+    def on_file_metadata_loaded(self, item, file_meta):
+        if self.loading_items.pop(id(item), None) is None:
+            # The row was deleted or cleared while its file was being read
+            if file_meta["temp_path"] and os.path.exists(file_meta["temp_path"]):
+                os.remove(file_meta["temp_path"])
+            return
+        if not self.loading_items:
+            profiler.take_snapshot("after ingest")
 
-                    # Check for 44.1kHz, 16bit, 2 channels, 1411kbps.
-                    if framerate == 44100 and (sampwidth * 8) == 16 and nchannels == 2:
-                        support_maya_status = "Yes"
+        # Initialize all variables with default values
+        file_date_modified = "N/A"
+        file_size = "N/A"
+        support_maya_status = "Yes" if file_meta["supports_maya"] else "No"
 
-        except (OSError, FileNotFoundError, wave.Error):
-            # This block catches any error during file access or parsing.
-            # Variables will remain as their default "N/A" or "No" values.
-            pass
+        if file_meta["mtime"] is not None:
+            file_date_modified = datetime.fromtimestamp(file_meta["mtime"]).strftime('%Y-%m-%d %H:%M %p')
+        if file_meta["size"] is not None:
+            file_size = f"{file_meta['size'] / (1024 * 1024):.2f} MB"
 
-        item = QTreeWidgetItem(self.treeWidget)
-        item.setText(0, str(new_item_number))
-        item.setText(1, file_name)
         item.setText(2, file_date_modified)
-        item.setText(3, file_type)
         item.setText(4, file_size)
         item.setText(5, support_maya_status)
-        item.setText(6, convert_progress)
-        item.setText(7, convert_status)
-
-        item.setData(0, Qt.ItemDataRole.UserRole, temp_file_path)
-        item.setData(1, Qt.ItemDataRole.UserRole, False)
-
-        # Add the item to the tree widget
-        self.treeWidget.addTopLevelItem(item)
-        
-        # Force an update of the widget to ensure it's displayed
-        self.treeWidget.repaint()
+        item.setText(7, "N/A")
+        if file_meta["error"]:
+            print(f"Failed to add {file_meta['source_path']}: {file_meta['error']}")
+            item.setText(7, "Failed")
+
+        # Without a temp copy (restored sessions) the source itself is converted
+        item.setData(0, Qt.ItemDataRole.UserRole, file_meta["temp_path"] or file_meta["source_path"])
+        item.setData(2, Qt.ItemDataRole.UserRole, file_meta)
+        # Files converted before show their overview straight away; others get
+        # a coarse one from the pool, which conversion later refines.
+        self.load_cached_waveform(item)
+        if not file_meta["error"] and not item.data(1, Qt.ItemDataRole.UserRole):
+            self.preview_items[id(item)] = item
+            self.metadata_loader.build_preview(item, file_meta)
+
+    def on_waveform_ready(self, item, waveform_path):
+        if self.preview_items.pop(id(item), None) is None:
+            return  # The row was deleted or cleared in the meantime
+        if not waveform_path:
+            return
+        self.load_cached_waveform(item)
+        self.treeWidget.viewport().update()
 
     def open_file_dialog(self):
         file_paths, _ = QFileDialog.getOpenFileName(self, "Select one or more files to open")
@@ -327,10 +767,14 @@ class MatMainWindow(QMainWindow, Ui_MainWindow):
         for item in selected_items:
             parent = item.parent()
             temp_file_path = item.data(0, Qt.ItemDataRole.UserRole)
+            self.loading_items.pop(id(item), None)
+            self.preview_items.pop(id(item), None)
+            self.unchecked_items.pop(id(item), None)
 
-            # Remove the temporary file from the disk
-            if temp_file_path and os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
+            # Remove the temporary file and any extra deliverables from the disk
+            for path in [temp_file_path] + (item.data(5, Qt.ItemDataRole.UserRole) or []):
+                if path and os.path.exists(path) and is_inside_folder(path, self.temp_dir):
+                    os.remove(path)
 
             if parent:
                 parent.removeChild(item)
@@ -348,11 +792,167 @@ class MatMainWindow(QMainWindow, Ui_MainWindow):
 
     def clear_list(self):
         # This will remove all items from the tree widget
+        self.stop_session_loading()
         self.treeWidget.clear()
+        self.loading_items.clear()
+        self.preview_items.clear()
+        self.unchecked_items.clear()
+        self.metadata_loader.cancel_previews()
 
         # Optional: You can show a message box to confirm the action
         QMessageBox.information(self, "List Cleared", "All items have been removed from the list.")
 
+    def save_session(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Session", filter="MAT Sessions (*.matsession)")
+        if not file_path:
+            return
+        if not file_path.lower().endswith(".matsession"):
+            file_path += ".matsession"
+
+        # Rows of a session that is still being opened are not in the list yet;
+        # their records are copied from the open session instead of built.
+        records = [self.session_record(self.treeWidget.topLevelItem(i)) for i in range(self.treeWidget.topLevelItemCount())]
+        reader = self.session_reader
+        if reader is not None:
+            records += [reader.record(index) for index in range(self.session_next_index, len(reader))]
+            if os.path.abspath(reader.path) == os.path.abspath(file_path):
+                # The open session cannot be replaced while it is mapped
+                self.finish_session_loading()
+        try:
+            write_session(file_path, records)
+        except OSError as e:
+            QMessageBox.critical(self, "Save Session Error", f"Failed to save the session.\nError: {e}")
+            return
+        QMessageBox.information(self, "Session Saved", f"{len(records)} item(s) have been saved.")
+
+    def session_record(self, item):
+        converted = bool(item.data(1, Qt.ItemDataRole.UserRole))
+        cues = item.data(7, Qt.ItemDataRole.UserRole)
+        return {
+            "columns": [item.text(column) for column in range(1, 8)],
+            "converted": converted,
+            "pinned": bool(item.data(3, Qt.ItemDataRole.UserRole)),
+            "output_paths": [item.data(0, Qt.ItemDataRole.UserRole)] + (item.data(5, Qt.ItemDataRole.UserRole) or []) if converted else [],
+            "clip_range": item.data(4, Qt.ItemDataRole.UserRole),
+            "cues": [(cue.name, cue.start, cue.end) for cue in cues] if cues else None,
+            "stats": item.data(6, Qt.ItemDataRole.UserRole),
+            "meta": item.data(2, Qt.ItemDataRole.UserRole),
+        }
+
+    def open_session(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Open Session", filter="MAT Sessions (*.matsession)")
+        if not file_path:
+            return
+
+        try:
+            reader = SessionReader(file_path)
+        except (OSError, ValueError, SessionError) as e:
+            QMessageBox.warning(self, "Open Session Error", f"Failed to open the session.\nError: {e}")
+            return
+
+        self.stop_session_loading()
+        self.treeWidget.clear()
+        self.loading_items.clear()
+        self.preview_items.clear()
+        self.unchecked_items.clear()
+        self.metadata_loader.cancel_previews()
+
+        # Rows are built a chunk at a time from the mapped file, so the list
+        # is usable while the rest is still being built. This is still one
+        # QTreeWidgetItem per record, not a lazy model.
+        self.session_reader = reader
+        self.session_next_index = 0
+        self.load_session_chunk()
+
+    def load_session_chunk(self):
+        reader = self.session_reader
+        if reader is None:
+            return
+        end = min(self.session_next_index + SESSION_CHUNK_SIZE, len(reader))
+        self.treeWidget.setUpdatesEnabled(False)
+        for index in range(self.session_next_index, end):
+            self.restore_session_item(reader.record(index), index + 1)
+        self.treeWidget.setUpdatesEnabled(True)
+        self.session_next_index = end
+        self.refresh_visible_rows()
+
+        if end < len(reader):
+            QTimer.singleShot(0, self.load_session_chunk)
+        else:
+            self.stop_session_loading()
+
+    def finish_session_loading(self):
+        while self.session_reader is not None:
+            self.load_session_chunk()
+
+    def stop_session_loading(self):
+        if self.session_reader is not None:
+            self.session_reader.close()
+            self.session_reader = None
+
+    def restore_session_item(self, record, number):
+        file_meta = record["meta"]
+        output_paths = record["output_paths"]
+        # Converted files live in the temp folder of the run that made them
+        converted = record["converted"] and all(os.path.exists(path) for path in output_paths)
+        columns = (record["columns"] + [""] * 7)[:7]
+
+        item = QTreeWidgetItem(self.treeWidget)
+        item.setText(0, str(number))
+        for column, text in enumerate(columns, 1):
+            item.setText(column, text)
+
+        item.setData(1, Qt.ItemDataRole.UserRole, converted)
+        item.setData(2, Qt.ItemDataRole.UserRole, file_meta)
+        item.setData(3, Qt.ItemDataRole.UserRole, record["pinned"])
+        item.setData(4, Qt.ItemDataRole.UserRole, record["clip_range"])
+        item.setData(6, Qt.ItemDataRole.UserRole, record["stats"])
+        cues = [Cue(name, start, end) for name, start, end in record["cues"]] if record["cues"] else None
+        item.setData(7, Qt.ItemDataRole.UserRole, cues)
+        if record["pinned"]:
+            font = item.font(1)
+            font.setBold(True)
+            item.setFont(1, font)
+
+        if cues:
+            item.setText(8, f"Cue List ({len(cues)} shots)")
+        else:
+            item.setText(8, format_range(record["clip_range"]))
+        item.setText(9, "N/A")
+        item.setText(10, "N/A")
+        item.setText(11, "N/A")
+
+        if converted:
+            item.setData(0, Qt.ItemDataRole.UserRole, output_paths[0])
+            item.setData(5, Qt.ItemDataRole.UserRole, output_paths[1:])
+            if record["stats"]:
+                show_loudness_stats(item, record["stats"])
+        else:
+            # Back to the source, as temp copies do not outlive their run. It is
+            # checked in the background once the row is shown, and only a
+            # changed file is copied and probed again.
+            item.setData(0, Qt.ItemDataRole.UserRole, file_meta["source_path"])
+            item.setData(5, Qt.ItemDataRole.UserRole, [])
+            item.setData(6, Qt.ItemDataRole.UserRole, None)
+            item.setText(1, member_basename(file_meta["source_path"]))
+            item.setText(3, os.path.splitext(file_meta["source_path"])[1][1:].lower())
+            item.setText(6, "N/A")
+            item.setText(7, "N/A")
+            self.unchecked_items[id(item)] = item
+        self.load_cached_waveform(item)
+
+    def refresh_visible_rows(self):
+        # Checks the sources of restored rows as they come into view
+        if not self.unchecked_items:
+            return
+        viewport_height = self.treeWidget.viewport().height()
+        item = self.treeWidget.itemAt(0, 0)
+        while item is not None and self.treeWidget.visualItemRect(item).top() < viewport_height:
+            if self.unchecked_items.pop(id(item), None) is not None:
+                self.loading_items[id(item)] = item
+                self.metadata_loader.refresh(item, item.data(2, Qt.ItemDataRole.UserRole))
+            item = self.treeWidget.itemBelow(item)
+
     def show_file(self):
         # Get the search query from the line edit and convert to lowercase for case-insensitive search
         search_text = self.lineEdit_1.text().strip().lower()
@@ -392,36 +992,153 @@ class MatMainWindow(QMainWindow, Ui_MainWindow):
             QMessageBox.information(self, "No Selection", "Please select one or more items to convert.")
             return
 
+        self.start_conversion(selected_items)
+
+    def start_conversion(self, items):
+        if any(id(item) in self.loading_items for item in items):
+            QMessageBox.information(self, "Files Loading", "Some files are still being added. Please try again in a moment.")
+            return
+
+        # Build the jobs with their estimated cost and let the scheduler order them
+        jobs = []
+        for index, item in enumerate(items):
+            # Unchecked restored rows convert straight from their source
+            self.unchecked_items.pop(id(item), None)
+            converted = item.data(1, Qt.ItemDataRole.UserRole)
+            cues = item.data(7, Qt.ItemDataRole.UserRole)
+            clip_range = cue_span(cues) if cues else item.data(4, Qt.ItemDataRole.UserRole)
+            priority = 1 if item.data(3, Qt.ItemDataRole.UserRole) else 0
+            # Converted items are skipped by the workers: no time, no memory,
+            # so they do not skew the makespan estimates or the policy choice
+            cost = 0.0 if converted else estimate_cost(item.data(2, Qt.ItemDataRole.UserRole), clip_range)
+            memory = 0 if converted else estimate_memory(
+                item.data(2, Qt.ItemDataRole.UserRole), clip_range, 1 + len(self.extra_profiles))
+            job = Job(item, cost, priority, index, memory)
+            if not converted:
+                job.spec = self.build_conversion_spec(item, cost)
+            jobs.append(job)
+
+        # With measurements available, concurrency may grow up to the CPU count
+        # while memory and CPU allow; otherwise it stays at worker_count.
+        self.resource_sampler = ResourceSampler()
+        max_workers = (os.cpu_count() or 1) if self.resource_sampler.available else self.worker_count
+        worker_count = max(1, min(max_workers, len(jobs)))
+        job_queue = JobQueue(jobs, self.schedule_policy, worker_count, self.memory_budget, self.worker_count)
+        self.job_queue = job_queue
+        # The policy comparison is shown while the batch runs and in the final message
+        self.statusBar().showMessage(job_queue.summary)
+        if self.resource_sampler.available:
+            self.resource_timer.start()
+
         # Set up and show the progress dialog
         self.progress_dialog = ProgressDialog(self)
         self.progress_dialog.label_6.setText("0")
-        self.progress_dialog.label_5.setText(str(len(selected_items)))
-        self.progress_dialog.progressBar.setMaximum(len(selected_items))
+        self.progress_dialog.label_5.setText(str(len(items)))
+        self.progress_dialog.setToolTip(job_queue.report)
+        self.progress_dialog.progressBar.setMaximum(len(items))
         self.progress_dialog.show()
 
-        # Create the thread and worker
-        self.thread = QThread()
-        self.worker = ConvertWorker(selected_items, self.temp_dir)
-        self.worker.moveToThread(self.thread)
-
-        # Connect signals and slots
-        self.thread.started.connect(self.worker.run)
-        self.worker.progress_updated.connect(self.update_progress_bar)
-        self.worker.finished.connect(self.on_conversion_finished)
-        self.worker.finished.connect(self.thread.quit)
-        self.worker.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater)
+        # Create one thread and worker per lane, all pulling from the same queue
+        self.threads = []
+        self.workers = []
+        self.running_workers = worker_count
+        for _ in range(worker_count):
+            thread = QThread()
+            worker = ConvertWorker(job_queue, self.temp_dir)
+            worker.moveToThread(thread)
+
+            # Connect signals and slots
+            thread.started.connect(worker.run)
+            worker.file_converted.connect(self.on_file_converted)
+            worker.progress_updated.connect(self.update_progress_bar)
+            worker.finished.connect(self.on_worker_finished)
+            worker.finished.connect(thread.quit)
+            worker.finished.connect(worker.deleteLater)
+            thread.finished.connect(thread.deleteLater)
+
+            self.threads.append(thread)
+            self.workers.append(worker)
+
+        for thread in self.threads:
+            thread.start()
+
+    def build_conversion_spec(self, item, cost):
+        # Read on the GUI thread, which owns the items; workers only get the spec
+        input_path = item.data(0, Qt.ItemDataRole.UserRole)
+        file_meta = item.data(2, Qt.ItemDataRole.UserRole)
+        clip_range = item.data(4, Qt.ItemDataRole.UserRole)
+        cues = item.data(7, Qt.ItemDataRole.UserRole)
+        # Cue splits have no single overview to draw
+        waveform_path = None if cues else waveform_cache_path(file_meta, clip_range)
+        # Archive members are read with the entry listed when they were added
+        member = file_meta.get("member") if file_meta and input_path == file_meta["source_path"] else None
+        return build_job_spec(input_path, self.temp_dir,
+                              [MAYA_PROFILE] + self.extra_profiles, clip_range, cues,
+                              self.loudness_target, waveform_path, cost, self.large_file_mode, member,
+                              file_meta.get("duration") if file_meta else None)
+
+    def on_file_converted(self, item, result):
+        if self.treeWidget.indexOfTopLevelItem(item) < 0:
+            return  # The row was deleted while it was converting
+
+        if result["error"] is not None:
+            item.setText(6, "Error")
+            item.setText(7, "Failed")
+            item.setToolTip(7, result["error"])
+            return
 
-        self.thread.start()
+        output_paths = result["output_paths"]
+        output_path = output_paths[0]
+        loudness_stats = result["stats"]
+        item.setData(0, Qt.ItemDataRole.UserRole, output_path)
+        item.setData(1, Qt.ItemDataRole.UserRole, True)
+        item.setData(5, Qt.ItemDataRole.UserRole, output_paths[1:])
+        item.setData(6, Qt.ItemDataRole.UserRole, loudness_stats)
+
+        # Update the TreeWidget item with the new converted file's info
+        item.setText(1, os.path.basename(output_path))
+        item.setText(2, datetime.fromtimestamp(result["mtime"]).strftime('%Y-%m-%d %H:%M:%S'))
+        item.setText(3, "wav")
+        item.setText(4, f"{result['size'] / (1024 * 1024):.2f} MB")
+        item.setText(5, result["supports_maya"])
+        item.setText(6, "Complete")
+        item.setText(7, "OK")
+        item.setToolTip(7, result["warning"] or "")
+        cues = item.data(7, Qt.ItemDataRole.UserRole)
+        if cues:
+            item.setText(7, f"OK ({len(cues)} shots)")
+        if result["warning"]:
+            item.setText(7, item.text(7) + " - see note")
+            item.setText(9, "Not normalized")
+        if loudness_stats:
+            show_loudness_stats(item, loudness_stats)
+        # The overview written by the conversion is read when the row is drawn
+        self.load_cached_waveform(item)
 
     def update_progress_bar(self, count):
         # This slot updates the progress dialog
+        # Workers report concurrently, so never move the bar backwards
+        count = max(count, self.progress_dialog.progressBar.value())
         self.progress_dialog.label_6.setText(str(count))
         self.progress_dialog.progressBar.setValue(count)
 
+    def on_worker_finished(self):
+        self.running_workers -= 1
+        if self.running_workers == 0:
+            self.on_conversion_finished()
+
+    def adapt_concurrency(self):
+        used_memory, cpu_percent = self.resource_sampler.sample()
+        self.job_queue.adapt(used_memory, cpu_percent)
+
     def on_conversion_finished(self):
+        self.resource_timer.stop()
+        profiler.take_snapshot("after convert")
         self.progress_dialog.close()
-        QMessageBox.information(self, "Conversion Complete", "Selected files have been converted successfully!")
+        message_box = QMessageBox(QMessageBox.Icon.Information, "Conversion Complete",
+                                  "Selected files have been converted successfully!", parent=self)
+        message_box.setDetailedText(self.job_queue.report)
+        message_box.exec()
         self.treeWidget.repaint()
 
     def convert_all(self):
@@ -433,28 +1150,7 @@ class MatMainWindow(QMainWindow, Ui_MainWindow):
             
         total_items = self.treeWidget.topLevelItemCount()
         all_items = [self.treeWidget.topLevelItem(i) for i in range(total_items)]
-    
-        # Set up and show the progress dialog
-        self.progress_dialog = ProgressDialog(self)
-        self.progress_dialog.label_6.setText("0")
-        self.progress_dialog.label_5.setText(str(total_items))
-        self.progress_dialog.progressBar.setMaximum(total_items)
-        self.progress_dialog.show()
-    
-        # Create the thread and worker
-        self.thread = QThread()
-        self.worker = ConvertWorker(all_items, self.temp_dir)
-        self.worker.moveToThread(self.thread)
-    
-        # Connect signals and slots
-        self.thread.started.connect(self.worker.run)
-        self.worker.progress_updated.connect(self.update_progress_bar)
-        self.worker.finished.connect(self.on_conversion_finished)
-        self.worker.finished.connect(self.thread.quit)
-        self.worker.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater)
-    
-        self.thread.start()
+        self.start_conversion(all_items)
 
     def browse_folder(self):
         # Open the file explorer to select a directory
@@ -518,17 +1214,21 @@ class MatMainWindow(QMainWindow, Ui_MainWindow):
 
         # Step 4: If all checks pass, start the download process
         for item in selected_items:
-            try:
-                temp_file_path = item.data(0, Qt.ItemDataRole.UserRole)
-                file_name = os.path.basename(temp_file_path)
-                destination_path = os.path.join(download_path, file_name)
+            # The Maya WAV plus any extra deliverables from the output profiles
+            temp_file_paths = [item.data(0, Qt.ItemDataRole.UserRole)] + (item.data(5, Qt.ItemDataRole.UserRole) or [])
+            for temp_file_path in temp_file_paths:
+                try:
+                    file_name = os.path.basename(temp_file_path)
+                    destination_path = os.path.join(download_path, file_name)
 
-                shutil.copy(temp_file_path, destination_path)
-                print(f"Downloaded {file_name} to {destination_path}")
+                    with profiler.phase(PHASE_DOWNLOAD):
+                        shutil.copy(temp_file_path, destination_path)
+                    print(f"Downloaded {file_name} to {destination_path}")
 
-            except Exception as e:
-                QMessageBox.critical(self, "Download Error", f"Failed to download {file_name}.\nError: {e}")
+                except Exception as e:
+                    QMessageBox.critical(self, "Download Error", f"Failed to download {file_name}.\nError: {e}")
 
+        profiler.take_snapshot("after download")
         QMessageBox.information(self, "Download Complete", "All selected files have been downloaded successfully!")
 
     def exit_application(self):
@@ -556,8 +1256,20 @@ class MatMainWindow(QMainWindow, Ui_MainWindow):
         about_dialog = AboutDialog(self)
         about_dialog.exec()
 
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(description="Maya Audio Tool")
+    parser.add_argument("--profile", nargs="?", const="", metavar="REPORT",
+                        help="profile the session and write a report to REPORT when MAT closes")
+    # Everything else is left to Qt
+    return parser.parse_known_args(argv[1:])
+
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = MatMainWindow()
+    arguments, qt_arguments = parse_arguments(sys.argv)
+    profile_report_path = None
+    if arguments.profile is not None:
+        profile_report_path = arguments.profile or default_report_path()
+        profiler.start()
+    app = QApplication(sys.argv[:1] + qt_arguments)
+    window = MatMainWindow(profile_report_path=profile_report_path)
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
@@ -0,0 +1,301 @@
+import io
+import os
+import posixpath
+import shutil
+import struct
+import tarfile
+import threading
+import wave
+import zipfile
+from datetime import datetime
+
+# Media inside zip/tar archives is listed and decoded in place. A member is
+# addressed as "<archive path>::<member name>" everywhere a file path goes
+# (list items, job specs, sessions), so nothing is ever extracted to disk.
+MEMBER_SEPARATOR = "::"
+
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+MEDIA_EXTENSIONS = {
+    ".mp4", ".avi", ".mkv", ".mov", ".wmv", ".flv", ".webm",
+    ".mp3", ".wav", ".flac", ".aac", ".m4a", ".ogg", ".aiff",
+}
+
+# Bytes handed to ffmpeg's stdin at a time for compressed members
+PIPE_BLOCK_SIZE = 1024 * 1024
+
+# Bytes of a WAV member read for its header; the samples come after it
+WAVE_HEAD_SIZE = 64 * 1024
+
+ZIP_LOCAL_HEADER = struct.Struct("<4s22xHH")
+ZIP_LOCAL_HEADER_MAGIC = b"PK\x03\x04"
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def is_archive(path):
+    return path.lower().endswith(ARCHIVE_EXTENSIONS) and os.path.isfile(path)
+
+
+def member_path(archive_path, member_name):
+    return f"{archive_path}{MEMBER_SEPARATOR}{member_name}"
+
+
+def split_member_path(path):
+    # (archive path, member name), or None for a plain file
+    archive_path, separator, member_name = path.partition(MEMBER_SEPARATOR)
+    if not separator or not archive_path.lower().endswith(ARCHIVE_EXTENSIONS):
+        return None
+    return archive_path, member_name
+
+
+def is_member_path(path):
+    return split_member_path(path) is not None
+
+
+def is_zip(archive_path):
+    return archive_path.lower().endswith(".zip")
+
+
+def member_basename(path):
+    # File name of a plain file or of an archive member, without the archive
+    # part: "takes.zip::day1/a.wav" -> "a.wav". Used for display, duplicate
+    # checks and output names.
+    split = split_member_path(path)
+    if split is None:
+        return os.path.basename(path)
+    return posixpath.basename(split[1].replace("\\", "/"))
+
+
+def reads_from_start(path):
+    # Members of a compressed tar can only be reached by decompressing the
+    # archive from its start, again for every read of a member.
+    split = split_member_path(path)
+    return split is not None and not is_zip(split[0]) and not split[0].lower().endswith(".tar")
+
+
+def list_media_members(archive_path):
+    # (member path, entry) of every media file in the archive, in archive
+    # order. The entry holds what later reads need, so they do not have to
+    # open the archive again: size, mtime and, for members stored as is,
+    # data_offset (None for compressed members). Compressed WAV members also
+    # get their header (see read_wave_head), read on the same pass.
+    try:
+        if is_zip(archive_path):
+            entries = list_zip_members(archive_path)
+        else:
+            entries = list_tar_members(archive_path)
+    except (OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+        raise ArchiveError(f"Cannot read {os.path.basename(archive_path)}: {e}")
+    return [(member_path(archive_path, name), entry) for name, entry in entries
+            if os.path.splitext(name)[1].lower() in MEDIA_EXTENSIONS]
+
+
+def member_entry(size, mtime, data_offset=None, header=None):
+    # Plain JSON types, so the entry can go into item metadata and job specs
+    return {"size": size, "mtime": mtime, "data_offset": data_offset, "header": header}
+
+
+def is_wave_name(name):
+    return name.lower().endswith(".wav")
+
+
+def read_wave_head(stream):
+    # Format of a WAV member from its first bytes, as a dict of metadata
+    # fields, or None if they do not hold a readable header. Works on
+    # streams that cannot seek, like members of a compressed tar.
+    try:
+        with wave.open(io.BytesIO(stream.read(WAVE_HEAD_SIZE)), 'r') as w:
+            frame_rate = w.getframerate()
+            return {
+                "channels": w.getnchannels(),
+                "sample_width": w.getsampwidth(),
+                "frame_rate": frame_rate,
+                "duration": w.getnframes() / frame_rate if frame_rate else None,
+            }
+    except (EOFError, wave.Error):
+        return None
+
+
+def list_zip_members(archive_path):
+    entries = []
+    with zipfile.ZipFile(archive_path) as archive, open(archive_path, "rb") as f:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            data_offset = header = None
+            if info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1:
+                data_offset = zip_data_offset(f, info)
+            elif is_wave_name(info.filename) and not info.flag_bits & 0x1:
+                with archive.open(info) as stream:
+                    header = read_wave_head(stream)
+            entries.append((info.filename, member_entry(info.file_size, datetime(*info.date_time).timestamp(),
+                                                        data_offset, header)))
+    return entries
+
+
+def zip_data_offset(f, info):
+    # The data follows the local header, whose extra field may differ from
+    # the one in the central directory.
+    f.seek(info.header_offset)
+    magic, name_length, extra_length = ZIP_LOCAL_HEADER.unpack(f.read(ZIP_LOCAL_HEADER.size))
+    if magic != ZIP_LOCAL_HEADER_MAGIC:
+        raise ArchiveError(f"Bad local header for {info.filename}")
+    return info.header_offset + ZIP_LOCAL_HEADER.size + name_length + extra_length
+
+
+def list_tar_members(archive_path):
+    try:
+        # Only an uncompressed tar has members at fixed offsets
+        with tarfile.open(archive_path, "r:") as archive:
+            return [(info.name, member_entry(info.size, float(info.mtime), info.offset_data))
+                    for info in archive if info.isfile()]
+    except tarfile.ReadError:
+        pass
+    # A compressed tar is read once from start to end to list it. WAV headers
+    # are taken on the way; reading one later would decompress everything
+    # in front of the member again.
+    entries = []
+    with tarfile.open(archive_path, "r|*") as archive:
+        for info in archive:
+            if not info.isfile():
+                continue
+            header = None
+            if is_wave_name(info.name):
+                with archive.extractfile(info) as stream:
+                    header = read_wave_head(stream)
+            entries.append((info.name, member_entry(info.size, float(info.mtime), header=header)))
+    return entries
+
+
+def stat_member(path):
+    # (size, mtime) of a member, like os.stat for a plain file. Opens the
+    # archive; members listed by list_media_members already have both.
+    archive_path, member_name = split_member_path(path)
+    try:
+        if is_zip(archive_path):
+            with zipfile.ZipFile(archive_path) as archive:
+                info = archive.getinfo(member_name)
+                return info.file_size, datetime(*info.date_time).timestamp()
+        with tarfile.open(archive_path, "r:*") as archive:
+            info = archive.getmember(member_name)
+            return info.size, float(info.mtime)
+    except KeyError:
+        raise FileNotFoundError(f"{member_name} is not in {os.path.basename(archive_path)}")
+    except (zipfile.BadZipFile, tarfile.TarError) as e:
+        raise ArchiveError(str(e))
+
+
+def stored_member_range(path, entry=None):
+    # (offset, size) of a member's bytes inside the archive when they are
+    # stored as is, so ffmpeg can read them straight from the archive file.
+    # None when the member is compressed and must be piped in. With the entry
+    # from list_media_members the archive is not opened at all.
+    if entry is not None:
+        if entry["data_offset"] is None:
+            return None
+        return entry["data_offset"], entry["size"]
+    archive_path, member_name = split_member_path(path)
+    if is_zip(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            info = archive.getinfo(member_name)
+            if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+                return None
+            with open(archive_path, "rb") as f:
+                return zip_data_offset(f, info), info.file_size
+    try:
+        with tarfile.open(archive_path, "r:") as archive:
+            info = archive.getmember(member_name)
+            return info.offset_data, info.size
+    except tarfile.ReadError:
+        return None
+
+
+def open_member(path, entry=None):
+    # Readable stream of a member's contents
+    archive_path, member_name = split_member_path(path)
+    stored = stored_member_range(path, entry) if entry is not None else None
+    if stored is not None:
+        # Stored members are read from the archive file directly
+        f = open(archive_path, "rb")
+        f.seek(stored[0])
+        return MemberStream(None, f)
+    if is_zip(archive_path):
+        archive = zipfile.ZipFile(archive_path)
+        stream = archive.open(member_name)
+        return MemberStream(archive, stream)
+    # Streamed, so a compressed tar is only decompressed up to the member
+    # instead of once to find it and again to read it. That is still from
+    # the start of the archive for every member (see reads_from_start).
+    # The stream cannot seek.
+    archive = tarfile.open(archive_path, "r|*")
+    for info in archive:
+        if info.name == member_name:
+            stream = archive.extractfile(info)
+            if stream is None:
+                break
+            return MemberStream(archive, stream)
+    archive.close()
+    raise ArchiveError(f"{member_name} is not a regular file in {os.path.basename(archive_path)}")
+
+
+class MemberStream:
+    # Closes the archive together with the member
+    def __init__(self, archive, stream):
+        self.archive = archive
+        self.stream = stream
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.stream.close()
+        if self.archive is not None:
+            self.archive.close()
+
+
+def media_input(path, entry=None):
+    # The ffmpeg input for a path and, for compressed members, the stream
+    # that has to be written to ffmpeg's stdin. entry is the member's entry
+    # from list_media_members, if known.
+    if not is_member_path(path):
+        return path, None
+    stored = stored_member_range(path, entry)
+    if stored is not None:
+        offset, size = stored
+        archive_path, _ = split_member_path(path)
+        # ffmpeg's subfile protocol reads a byte range of the archive, seekably
+        return f"subfile,,start,{offset},end,{offset + size},,:{archive_path}", None
+    return "pipe:0", open_member(path, entry)
+
+
+class PipeFeeder(threading.Thread):
+    # Copies a member stream into ffmpeg's stdin. ffmpeg closing its end early
+    # (an out point was reached, or it failed) is not an error here.
+    def __init__(self, stream, pipe):
+        super().__init__(name="mat-archive-feeder", daemon=True)
+        self.stream = stream
+        self.pipe = pipe
+        self.error = None  # A damaged member, raised by the decoder afterwards
+
+    def run(self):
+        try:
+            shutil.copyfileobj(self.stream, self.pipe, PIPE_BLOCK_SIZE)
+        except (BrokenPipeError, ValueError):
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            self.stream.close()
+            try:
+                self.pipe.close()
+            except OSError:
+                pass
@@ -0,0 +1,263 @@
+import argparse
+import csv
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import time
+
+# Bulk Maya-compatibility audit of existing WAV libraries. Only the chunk
+# headers are read, through a memory map, so the sample data is never
+# paged in and a library is checked at about the speed of its directory walk.
+
+WAVE_EXTENSIONS = {".wav", ".wave", ".bwf", ".rf64"}
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+# Sub-format GUID of PCM data in an EXTENSIBLE header
+KSDATAFORMAT_SUBTYPE_PCM = bytes.fromhex("0100000000001000800000aa00389b71")
+
+# A 32-bit size of all ones in an RF64 file means "see the ds64 chunk"
+RF64_SIZE_IN_DS64 = 0xFFFFFFFF
+
+CHUNK_HEADER = struct.Struct("<4sI")
+FMT_PCM = struct.Struct("<HHIIHH")
+DS64 = struct.Struct("<QQQ")
+
+MAYA_FRAME_RATE = 44100
+MAYA_SAMPLE_WIDTH = 2
+MAYA_CHANNELS = 2
+
+# Files handed to a worker process at a time
+AUDIT_CHUNK_SIZE = 256
+
+
+class AuditResult:
+    def __init__(self, path, size=0):
+        self.path = path
+        self.size = size
+        self.errors = []             # The file is damaged or not a valid WAV
+        self.incompatibilities = []  # A valid WAV that Maya cannot use as is
+        self.container = None        # "RIFF" or "RF64"
+        self.format_tag = None
+        self.frame_rate = None
+        self.sample_width = None
+        self.channels = None
+        self.duration = None
+
+    @property
+    def compliant(self):
+        return not self.errors and not self.incompatibilities
+
+    @property
+    def problems(self):
+        return self.errors + self.incompatibilities
+
+
+def is_chunk_id(chunk_id):
+    return all(0x20 <= byte <= 0x7E for byte in chunk_id)
+
+
+def audit_file(path):
+    # Never raises; everything that is wrong ends up in the result.
+    result = AuditResult(path)
+    try:
+        with open(path, "rb") as f:
+            result.size = os.fstat(f.fileno()).st_size
+            if result.size < 12:
+                result.errors.append("File is too small for a RIFF header")
+                return result
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                check_wave(data, result)
+    except (OSError, ValueError) as e:
+        result.errors.append(f"Cannot read the file: {e}")
+    return result
+
+
+def check_wave(data, result):
+    file_size = len(data)
+    container, riff_size, form = struct.unpack_from("<4sI4s", data, 0)
+    if container not in (b"RIFF", b"RF64", b"BW64") or form != b"WAVE":
+        result.errors.append("Not a RIFF/WAVE file")
+        return
+    result.container = "RIFF" if container == b"RIFF" else "RF64"
+    if result.container == "RF64":
+        result.incompatibilities.append("RF64 file; Maya reads plain RIFF WAV files only")
+
+    ds64 = None
+    fmt_seen = False
+    block_align = None
+    data_chunk = None  # (offset, declared size)
+    offset = 12
+    while offset + CHUNK_HEADER.size <= file_size:
+        chunk_id, chunk_size = CHUNK_HEADER.unpack_from(data, offset)
+        if not is_chunk_id(chunk_id):
+            result.errors.append(f"Invalid chunk id at offset {offset}")
+            break
+        body = offset + CHUNK_HEADER.size
+
+        if chunk_id == b"ds64":
+            if result.container != "RF64" or offset != 12:
+                result.errors.append("ds64 chunk outside the first chunk of an RF64 file")
+            elif chunk_size < DS64.size or body + DS64.size > file_size:
+                result.errors.append("ds64 chunk is too short")
+            else:
+                ds64 = DS64.unpack_from(data, body)
+                riff_size = ds64[0]
+        elif chunk_id == b"fmt ":
+            if fmt_seen:
+                result.errors.append("More than one fmt chunk")
+            elif data_chunk is not None:
+                result.errors.append("fmt chunk comes after the data chunk")
+            fmt_seen = True
+            block_align = check_fmt(data, body, chunk_size, result)
+        elif chunk_id == b"data":
+            if data_chunk is not None:
+                result.errors.append("More than one data chunk")
+            if chunk_size == RF64_SIZE_IN_DS64 and ds64 is not None:
+                chunk_size = ds64[1]
+            data_chunk = (body, chunk_size)
+
+        end = body + chunk_size
+        if end > file_size:
+            name = chunk_id.decode("ascii").strip()
+            result.errors.append(f"'{name}' chunk declares {chunk_size} bytes but only {file_size - body} are in the file")
+            break
+        if chunk_size & 1:
+            if end == file_size:
+                result.errors.append(f"Missing pad byte after the odd-sized '{chunk_id.decode('ascii').strip()}' chunk")
+                break
+            # Some writers leave the pad byte out; see which offset holds a chunk
+            if (end + 1 + CHUNK_HEADER.size <= file_size and not is_chunk_id(data[end + 1:end + 5])
+                    and is_chunk_id(data[end:end + 4])):
+                result.errors.append(f"Missing pad byte after the odd-sized '{chunk_id.decode('ascii').strip()}' chunk")
+            else:
+                end += 1
+        offset = end
+
+    if 0 < file_size - offset < CHUNK_HEADER.size:
+        result.errors.append(f"{file_size - offset} stray byte(s) at the end of the file")
+    if result.container == "RF64" and ds64 is None:
+        result.errors.append("RF64 file without a ds64 chunk")
+    if riff_size + 8 > file_size:
+        result.errors.append(f"RIFF size declares {riff_size + 8} bytes but the file has {file_size} (truncated)")
+    elif riff_size + 8 < file_size:
+        result.errors.append(f"{file_size - riff_size - 8} byte(s) after the end of the RIFF chunk")
+
+    if not fmt_seen:
+        result.errors.append("No fmt chunk")
+    if data_chunk is None:
+        result.errors.append("No data chunk")
+    if block_align is None or data_chunk is None:
+        return
+
+    data_offset, data_size = data_chunk
+    actual_size = min(data_size, file_size - data_offset)
+    if block_align and actual_size % block_align:
+        result.errors.append(f"data size {actual_size} is not a whole number of {block_align}-byte frames")
+    if result.frame_rate and block_align:
+        result.duration = actual_size // block_align / result.frame_rate
+
+
+def check_fmt(data, body, chunk_size, result):
+    # Fills in the format and returns the block align, or None if unusable.
+    if chunk_size < FMT_PCM.size or body + FMT_PCM.size > len(data):
+        result.errors.append("fmt chunk is too short")
+        return None
+    format_tag, channels, frame_rate, byte_rate, block_align, bits = FMT_PCM.unpack_from(data, body)
+    result.format_tag = format_tag
+    result.channels = channels
+    result.frame_rate = frame_rate
+    result.sample_width = (bits + 7) // 8
+
+    if format_tag == WAVE_FORMAT_EXTENSIBLE:
+        result.incompatibilities.append("WAVE_FORMAT_EXTENSIBLE header; Maya expects a plain PCM fmt chunk")
+        if chunk_size < 40 or body + 40 > len(data):
+            result.errors.append("EXTENSIBLE fmt chunk is too short")
+        elif data[body + 24:body + 40] != KSDATAFORMAT_SUBTYPE_PCM:
+            result.incompatibilities.append("EXTENSIBLE sub-format is not PCM")
+    elif format_tag != WAVE_FORMAT_PCM:
+        result.incompatibilities.append(f"Format tag 0x{format_tag:04X} is not PCM")
+
+    if not channels or not frame_rate or not bits:
+        result.errors.append("fmt chunk has zero channels, rate or bits")
+        return None
+    if block_align != channels * result.sample_width:
+        result.errors.append(f"Block align {block_align} does not match {channels} channel(s) of {bits} bits")
+    if byte_rate != frame_rate * block_align:
+        result.errors.append(f"Byte rate {byte_rate} does not match the rate and block align")
+
+    if (frame_rate, result.sample_width, channels) != (MAYA_FRAME_RATE, MAYA_SAMPLE_WIDTH, MAYA_CHANNELS):
+        result.incompatibilities.append(f"{frame_rate} Hz, {bits} bit, {channels} channel(s); "
+                                        "Maya needs 44100 Hz, 16 bit, 2 channels")
+    return block_align
+
+
+def iter_wave_files(roots):
+    # Files and directory trees, in a stable order, without following links
+    for root in roots:
+        if os.path.isfile(root):
+            yield root
+            continue
+        for folder, folders, files in os.walk(root):
+            folders.sort()
+            for file_name in sorted(files):
+                if os.path.splitext(file_name)[1].lower() in WAVE_EXTENSIONS:
+                    yield os.path.join(folder, file_name)
+
+
+def audit_tree(roots, workers=None):
+    # Yields an AuditResult per file as workers finish them, so memory stays
+    # flat however large the library is.
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from map(audit_file, iter_wave_files(roots))
+        return
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(audit_file, iter_wave_files(roots), AUDIT_CHUNK_SIZE)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check WAV files for Maya compatibility")
+    parser.add_argument("paths", nargs="+", help="Files or folders to audit, searched recursively")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--csv", default=None, help="Also write every result to this CSV file")
+    parser.add_argument("--all", action="store_true", help="Print compliant files too")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    counts = {"files": 0, "broken": 0, "incompatible": 0}
+    csv_file = open(args.csv, "w", newline="", encoding="utf-8") if args.csv else None
+    try:
+        writer = csv.writer(csv_file) if csv_file else None
+        if writer:
+            writer.writerow(["path", "status", "container", "frame_rate", "sample_width", "channels",
+                             "duration", "problems"])
+        for result in audit_tree(args.paths, max(1, args.jobs)):
+            counts["files"] += 1
+            status = "broken" if result.errors else "incompatible" if result.incompatibilities else "ok"
+            if status != "ok":
+                counts[status] += 1
+            if status != "ok" or args.all:
+                print(f"{status.upper():<13}{result.path}")
+                for problem in result.problems:
+                    print(f"    {problem}")
+            if writer:
+                writer.writerow([result.path, status, result.container or "", result.frame_rate or "",
+                                 result.sample_width or "", result.channels or "",
+                                 f"{result.duration:.3f}" if result.duration is not None else "",
+                                 "; ".join(result.problems)])
+    finally:
+        if csv_file:
+            csv_file.close()
+
+    elapsed = time.perf_counter() - started
+    rate = counts["files"] / elapsed if elapsed > 0 else 0.0
+    print(f"Audited {counts['files']} file(s) in {elapsed:.1f} s ({rate:.0f} files/s): "
+          f"{counts['broken']} broken, {counts['incompatible']} not Maya-ready.")
+    return 0 if not counts["broken"] and not counts["incompatible"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,418 @@
+import argparse
+import collections
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from mat_scheduler import Job, estimate_cost, order_jobs, POLICY_LONGEST_FIRST
+from mat_wavwriter import LARGE_FILE_RF64, LARGE_FILE_SPLIT
+from mat_archive import member_basename, ArchiveError
+
+# Distributed conversion: a coordinator hands out job specs (see mat_jobs)
+# to headless worker daemons over TCP or Unix sockets. Inputs and outputs are
+# passed as paths, so every worker must see the same (shared) file system.
+#
+# Protocol: one JSON object per line.
+#   worker -> coordinator: hello, request, heartbeat, done, failed
+#   coordinator -> worker: job, wait, shutdown
+
+DEFAULT_ADDRESS = "tcp:127.0.0.1:7845"
+
+# Workers send a heartbeat this often, also while a job is running.
+HEARTBEAT_INTERVAL = 2.0
+# A worker that is silent for this long is dead; its jobs are queued again.
+HEARTBEAT_TIMEOUT = 10.0
+# Idle workers ask again after this long while other workers are still busy.
+WAIT_INTERVAL = 0.5
+# A job whose workers died this many times is reported as failed.
+MAX_ATTEMPTS = 3
+
+
+def parse_address(address):
+    # "tcp:HOST:PORT", "HOST:PORT" or "unix:PATH"
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    if address.startswith("tcp:"):
+        address = address[len("tcp:"):]
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid address: '{address}'")
+    return socket.AF_INET, (host, int(port))
+
+
+class Connection:
+    # Line-delimited JSON over a socket; sends may come from several threads.
+    def __init__(self, sock):
+        self.sock = sock
+        self.reader = sock.makefile("rb")
+        self.send_lock = threading.Lock()
+
+    def send(self, message):
+        data = (json.dumps(message) + "\n").encode("utf-8")
+        with self.send_lock:
+            self.sock.sendall(data)
+
+    def receive(self):
+        # Returns None when the other side has closed the connection.
+        line = self.reader.readline()
+        if not line:
+            return None
+        return json.loads(line)
+
+    def close(self):
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class Coordinator:
+    def __init__(self, specs):
+        self.specs = dict(enumerate(specs))
+        jobs = [Job(job_id, spec.get("cost", 0.0), 0, job_id) for job_id, spec in self.specs.items()]
+        # Longest first keeps the batch from ending on one long straggler
+        self.pending = collections.deque(job.item for job in order_jobs(jobs, POLICY_LONGEST_FIRST))
+        self.reserved = {}    # worker -> deque of job ids taken from pending for it
+        self.running = {}     # worker -> job id
+        self.attempts = collections.Counter()
+        self.results = {}     # job id -> result
+        self.failures = {}    # job id -> error message
+        self.completed_by = collections.Counter()
+        self.steals = 0
+        self.requeues = 0
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        self.started_at = time.monotonic()
+        if not self.specs:
+            self.finished.set()
+
+    def register(self, worker):
+        with self.lock:
+            self.reserved[worker] = collections.deque()
+
+    def take_job(self, worker):
+        # Returns (job id, spec), or None when there is nothing to hand out now.
+        with self.lock:
+            own = self.reserved[worker]
+            if not own and self.pending:
+                # Reserve a share of what is left; the share shrinks as the
+                # queue drains so the tail is spread over all workers.
+                share = max(1, len(self.pending) // (2 * max(1, len(self.reserved))))
+                for _ in range(min(share, len(self.pending))):
+                    own.append(self.pending.popleft())
+            if not own:
+                # Steal from the back of the busiest worker's reservation
+                victim = max(self.reserved.values(), key=len, default=None)
+                if victim:
+                    own.append(victim.pop())
+                    self.steals += 1
+            if not own:
+                return None
+            job_id = own.popleft()
+            self.running[worker] = job_id
+            return job_id, self.specs[job_id]
+
+    def complete(self, worker, job_id, result=None, error=None):
+        with self.lock:
+            # A worker that was given up on may still finish; by then its job
+            # has been queued again or handed to another worker, whose
+            # answer is the one that counts.
+            if self.running.get(worker) != job_id or job_id in self.results or job_id in self.failures:
+                print(f"Ignoring a late answer from {worker} for job {job_id}")
+                return
+            del self.running[worker]
+            if error is None:
+                self.results[job_id] = result
+                self.completed_by[worker] += 1
+            else:
+                self.failures[job_id] = error
+            self.check_finished()
+
+    def release(self, worker):
+        # The worker is gone: its running and reserved jobs go back to the queue.
+        with self.lock:
+            own = self.reserved.pop(worker, collections.deque())
+            job_id = self.running.pop(worker, None)
+            if job_id is not None:
+                self.attempts[job_id] += 1
+                if self.attempts[job_id] >= MAX_ATTEMPTS:
+                    self.failures[job_id] = f"Worker died {self.attempts[job_id]} times while running this job"
+                else:
+                    own.appendleft(job_id)
+            self.requeues += len(own)
+            self.pending.extendleft(reversed(own))
+            self.check_finished()
+
+    def check_finished(self):
+        if len(self.results) + len(self.failures) == len(self.specs):
+            self.finished.set()
+
+    def report(self):
+        elapsed = time.monotonic() - self.started_at
+        media_seconds = sum(self.specs[job_id].get("cost", 0.0) for job_id in self.results)
+        lines = [
+            f"Converted {len(self.results)} of {len(self.specs)} file(s) in {elapsed:.1f} s "
+            f"({len(self.results) / elapsed if elapsed else 0:.2f} files/s, "
+            f"~{media_seconds / elapsed if elapsed else 0:.1f}x realtime by estimated duration)",
+            f"Steals: {self.steals}, requeued jobs: {self.requeues}",
+        ]
+        for worker, count in sorted(self.completed_by.items()):
+            lines.append(f"  {worker}: {count} file(s)")
+        for job_id, error in sorted(self.failures.items()):
+            lines.append(f"  Failed: {self.specs[job_id]['input_path']}: {error}")
+        return "\n".join(lines)
+
+
+class CoordinatorHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        coordinator = self.server.coordinator
+        # Reads time out when a worker stops sending heartbeats
+        self.request.settimeout(HEARTBEAT_TIMEOUT)
+        connection = Connection(self.request)
+        worker = None
+        try:
+            hello = connection.receive()
+            if not hello or hello.get("type") != "hello":
+                return
+            worker = f"{hello.get('name', 'worker')}#{id(self)}"
+            coordinator.register(worker)
+            print(f"Worker joined: {worker}")
+
+            while True:
+                message = connection.receive()
+                if message is None:
+                    break
+                kind = message.get("type")
+                if kind == "request":
+                    if coordinator.finished.is_set():
+                        connection.send({"type": "shutdown"})
+                        continue
+                    taken = coordinator.take_job(worker)
+                    if taken is None:
+                        connection.send({"type": "wait", "seconds": WAIT_INTERVAL})
+                    else:
+                        job_id, spec = taken
+                        connection.send({"type": "job", "job_id": job_id, "spec": spec})
+                elif kind == "done":
+                    coordinator.complete(worker, message["job_id"], result=message.get("result"))
+                elif kind == "failed":
+                    coordinator.complete(worker, message["job_id"], error=message.get("error", "Unknown error"))
+                # Heartbeats only need to arrive; reading them resets the timeout
+        except (OSError, ValueError) as e:
+            print(f"Lost worker {worker}: {e}")
+        finally:
+            if worker is not None:
+                coordinator.release(worker)
+                print(f"Worker left: {worker}")
+            connection.close()
+
+
+class TCPCoordinatorServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class UnixCoordinatorServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+else:
+    UnixCoordinatorServer = None
+
+
+def serve(coordinator, address):
+    # Runs until every job has finished or failed, then returns the report.
+    family, bind_address = parse_address(address)
+    if family == socket.AF_UNIX:
+        if UnixCoordinatorServer is None:
+            raise ValueError("Unix sockets are not available on this platform")
+        if os.path.exists(bind_address):
+            os.remove(bind_address)
+        server = UnixCoordinatorServer(bind_address, CoordinatorHandler)
+    else:
+        server = TCPCoordinatorServer(bind_address, CoordinatorHandler)
+    server.coordinator = coordinator
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        coordinator.finished.wait()
+        # Let idle workers pick up their shutdown message
+        time.sleep(WAIT_INTERVAL * 2)
+    finally:
+        server.shutdown()
+        server.server_close()
+        if family == socket.AF_UNIX and os.path.exists(bind_address):
+            os.remove(bind_address)
+    return coordinator.report()
+
+
+def connect(address, retry_for=10.0):
+    family, target = parse_address(address)
+    deadline = time.monotonic() + retry_for
+    while True:
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            sock.connect(target)
+            return sock
+        except OSError:
+            sock.close()
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.2)
+
+
+def run_worker(address, name=None, run_job=None):
+    # Headless worker daemon: asks for jobs until the coordinator says shutdown.
+    if run_job is None:
+        from mat_jobs import run_job_spec as run_job
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    sock = connect(address)
+    # Replies come straight away, a silent coordinator is gone
+    sock.settimeout(HEARTBEAT_TIMEOUT)
+    connection = Connection(sock)
+    connection.send({"type": "hello", "name": name})
+
+    stop = threading.Event()
+
+    def send_heartbeats():
+        while not stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                connection.send({"type": "heartbeat"})
+            except OSError:
+                return
+
+    threading.Thread(target=send_heartbeats, daemon=True).start()
+    converted = 0
+    try:
+        while True:
+            connection.send({"type": "request"})
+            message = connection.receive()
+            if message is None or message.get("type") == "shutdown":
+                break
+            if message.get("type") == "wait":
+                time.sleep(message.get("seconds", WAIT_INTERVAL))
+                continue
+
+            job_id = message["job_id"]
+            try:
+                result = run_job(message["spec"])
+            except Exception as e:
+                connection.send({"type": "failed", "job_id": job_id, "error": str(e)})
+            else:
+                if result.get("warning"):
+                    print(f"{member_basename(message['spec']['input_path'])}: {result['warning']}")
+                connection.send({"type": "done", "job_id": job_id, "result": result})
+                converted += 1
+    finally:
+        stop.set()
+        connection.close()
+    return converted
+
+
+def build_specs(input_paths, output_dir, profile_keys, loudness_target=None, large_file_mode=LARGE_FILE_RF64):
+    from mat_convert import PROFILES_BY_KEY
+    from mat_jobs import build_job_spec
+    from mat_archive import is_archive, list_media_members
+    profiles = [PROFILES_BY_KEY[key] for key in profile_keys]
+    # Archives are expanded to their media members, which workers read in
+    # place using the entry listed here
+    expanded = []
+    for input_path in input_paths:
+        input_path = os.path.abspath(input_path)
+        expanded += list_media_members(input_path) if is_archive(input_path) else [(input_path, None)]
+
+    # Outputs are named after the input's file name only, so two inputs with
+    # the same name would overwrite each other's outputs. Rejected, as in the GUI.
+    by_name = collections.defaultdict(list)
+    for input_path, _ in expanded:
+        by_name[os.path.splitext(member_basename(input_path))[0].lower()].append(input_path)
+    clashes = [paths for paths in by_name.values() if len(paths) > 1]
+    if clashes:
+        raise ValueError("Inputs would write to the same output files:\n"
+                         + "\n".join("  " + ", ".join(paths) for paths in clashes))
+
+    specs = []
+    for input_path, member in expanded:
+        if member is not None:
+            meta = {"size": member["size"]}
+        else:
+            try:
+                meta = {"size": os.path.getsize(input_path)}
+            except OSError:
+                meta = None
+        specs.append(build_job_spec(input_path, os.path.abspath(output_dir), profiles,
+                                    loudness_target=loudness_target, cost=estimate_cost(meta),
+                                    large_file_mode=large_file_mode, member=member))
+    return specs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distributed MAT conversion")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_batch_arguments(subparser):
+        subparser.add_argument("inputs", nargs="+", help="Files to convert, on a path every worker can read")
+        subparser.add_argument("-o", "--output", required=True, help="Output folder, on a path every worker can write")
+        subparser.add_argument("--profile", action="append", default=None,
+                               help="Output profile key (default: maya); repeat for more")
+        subparser.add_argument("--loudness", type=float, default=None, help="Normalize to this many LUFS")
+        subparser.add_argument("--split-large", action="store_const", const=LARGE_FILE_SPLIT, default=LARGE_FILE_RF64,
+                               dest="large_file_mode", help="Split outputs past 4 GB into numbered parts instead of RF64")
+
+    coordinator_parser = subparsers.add_parser("coordinator", help="Hand out a batch to worker daemons")
+    coordinator_parser.add_argument("--listen", default=DEFAULT_ADDRESS, help="tcp:HOST:PORT or unix:PATH")
+    add_batch_arguments(coordinator_parser)
+
+    worker_parser = subparsers.add_parser("worker", help="Run a headless worker daemon")
+    worker_parser.add_argument("--connect", default=DEFAULT_ADDRESS, help="tcp:HOST:PORT or unix:PATH")
+    worker_parser.add_argument("--name", default=None)
+
+    local_parser = subparsers.add_parser("local", help="Coordinator plus N worker processes on this machine")
+    local_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    local_parser.add_argument("--listen", default=DEFAULT_ADDRESS, help="tcp:HOST:PORT or unix:PATH")
+    add_batch_arguments(local_parser)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        try:
+            converted = run_worker(args.connect, args.name)
+        except OSError as e:
+            print(f"Lost connection to the coordinator: {e}")
+            return 1
+        print(f"Worker finished after converting {converted} file(s).")
+        return 0
+
+    try:
+        specs = build_specs(args.inputs, args.output, args.profile or ["maya"], args.loudness, args.large_file_mode)
+    except (ValueError, ArchiveError) as e:
+        print(e)
+        return 2
+    os.makedirs(args.output, exist_ok=True)
+    coordinator = Coordinator(specs)
+
+    processes = []
+    if args.command == "local":
+        # Worker processes on this machine, to measure scaling before
+        # rolling the daemons out across nodes.
+        for index in range(max(1, args.workers)):
+            processes.append(subprocess.Popen([sys.executable, os.path.abspath(__file__), "worker",
+                                               "--connect", args.listen, "--name", f"local-{index + 1}"]))
+    try:
+        print(serve(coordinator, args.listen))
+    finally:
+        for process in processes:
+            try:
+                process.wait(timeout=HEARTBEAT_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                process.kill()
+    return 0 if not coordinator.failures else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
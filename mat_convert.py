@@ -0,0 +1,315 @@
+import os
+import subprocess
+import tempfile
+from pydub import AudioSegment
+from mat_loudness import EBUR128_FILTER, PeakMeter, parse_ebur128_summary, normalization_gain, apply_gain
+from mat_waveform import WaveformBuilder
+from mat_cues import cue_span
+from mat_archive import media_input, member_basename, PipeFeeder, ArchiveError
+from mat_wavwriter import WaveWriter, LARGE_FILE_RF64
+
+try:
+    import audioop
+except ImportError:
+    import pyaudioop as audioop
+
+# Amount of decoded audio handed to the writers at a time.
+BLOCK_SECONDS = 1
+
+# ffmpeg raw formats for each sample width in bytes.
+RAW_FORMATS = {2: "s16le", 3: "s24le", 4: "s32le"}
+
+
+class ConversionError(Exception):
+    pass
+
+
+class OutputProfile:
+    def __init__(self, key, name, frame_rate, sample_width, channels, suffix):
+        self.key = key
+        self.name = name
+        self.frame_rate = frame_rate
+        self.sample_width = sample_width
+        self.channels = channels
+        self.suffix = suffix  # Appended to the output file name
+
+    def output_file_name(self, base_name):
+        return f"{base_name}{self.suffix}.wav"
+
+
+# Maya wants 44.1kHz, 16bit, 2 channels.
+MAYA_PROFILE = OutputProfile("maya", "Maya (44.1kHz, 16bit, Stereo)", 44100, 2, 2, "")
+
+PROFILES = [
+    MAYA_PROFILE,
+    OutputProfile("delivery_48k24", "Delivery (48kHz, 24bit, Stereo)", 48000, 3, 2, "_48k24"),
+    OutputProfile("scratch_mono", "Scratch (44.1kHz, 16bit, Mono)", 44100, 2, 1, "_mono"),
+]
+
+PROFILES_BY_KEY = {profile.key: profile for profile in PROFILES}
+
+
+def decode_format(profiles):
+    # One format that every profile can be derived from without losing quality:
+    # the highest rate, width and channel count asked for.
+    frame_rate = max(profile.frame_rate for profile in profiles)
+    sample_width = max(profile.sample_width for profile in profiles)
+    channels = max(profile.channels for profile in profiles)
+    return frame_rate, sample_width, channels
+
+
+class ProfileConverter:
+    # Turns blocks of the decoded format into blocks of one profile.
+    # audioop.ratecv keeps its state between calls, so blocks join seamlessly.
+    def __init__(self, source_format, profile):
+        self.source_rate, self.source_width, self.source_channels = source_format
+        self.profile = profile
+        self.rate_state = None
+
+    def convert(self, block):
+        width = self.source_width
+        if self.source_channels == 2 and self.profile.channels == 1:
+            block = audioop.tomono(block, width, 0.5, 0.5)
+        elif self.source_channels == 1 and self.profile.channels == 2:
+            block = audioop.tostereo(block, width, 1, 1)
+        if self.source_rate != self.profile.frame_rate:
+            block, self.rate_state = audioop.ratecv(
+                block, width, self.profile.channels,
+                self.source_rate, self.profile.frame_rate, self.rate_state
+            )
+        if width != self.profile.sample_width:
+            block = audioop.lin2lin(block, width, self.profile.sample_width)
+        return block
+
+
+def build_decode_command(input_path, clip_range=None, source_format=None, audio_filters=None, log_level="error"):
+    # input_path is anything ffmpeg takes after -i (a file, pipe:0, a subfile URL)
+    frame_rate, sample_width, channels = source_format or decode_format([MAYA_PROFILE])
+    raw_format = RAW_FORMATS[sample_width]
+    # ffmpeg is taken from pydub so a custom AudioSegment.converter is respected.
+    command = [AudioSegment.converter, "-nostdin", "-hide_banner", "-nostats", "-v", log_level]
+    if clip_range:
+        start, end = clip_range
+        # -ss/-t before -i are input options: ffmpeg seeks in the container
+        # and stops reading at the out point instead of decoding the whole file.
+        command += ["-ss", f"{start:.6f}"]
+        if end is not None:
+            command += ["-t", f"{end - start:.6f}"]
+    command += ["-i", input_path, "-vn", "-sn", "-dn"]
+    if audio_filters:
+        command += ["-af", ",".join(audio_filters)]
+    command += [
+        "-f", raw_format, "-acodec", f"pcm_{raw_format}",
+        "-ar", str(frame_rate), "-ac", str(channels),
+        "-",
+    ]
+    return command
+
+
+class Decoder:
+    # Iterating yields raw PCM blocks of source_format from a single ffmpeg
+    # decode. Afterwards, log holds what ffmpeg printed (filter summaries).
+    # member is the archive entry of a member path, if known.
+    def __init__(self, input_path, clip_range=None, source_format=None, audio_filters=None, member=None):
+        self.input_path = input_path
+        self.member = member
+        self.clip_range = clip_range
+        self.source_format = source_format or decode_format([MAYA_PROFILE])
+        self.audio_filters = audio_filters or []
+        self.log = ""
+
+    def __iter__(self):
+        frame_rate, sample_width, channels = self.source_format
+        block_size = frame_rate * sample_width * channels * BLOCK_SECONDS
+        # Filter summaries are printed at info level
+        log_level = "info" if self.audio_filters else "error"
+        try:
+            # Archive members are read in place or piped in, never extracted
+            ffmpeg_input, member_stream = media_input(self.input_path, self.member)
+        except (OSError, KeyError, ArchiveError) as e:
+            raise ConversionError(f"Cannot open {member_basename(self.input_path)}: {e}")
+        command = build_decode_command(ffmpeg_input, self.clip_range, self.source_format, self.audio_filters, log_level)
+
+        # stderr goes to a file so a chatty ffmpeg can never block the pipe we read from.
+        feeder = None
+        with tempfile.TemporaryFile() as log_file:
+            process = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE if member_stream else subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=log_file,
+            )
+            if member_stream:
+                feeder = PipeFeeder(member_stream, process.stdin)
+                feeder.start()
+            try:
+                while True:
+                    block = process.stdout.read(block_size)
+                    if not block:
+                        break
+                    yield block
+                return_code = process.wait()
+            finally:
+                # Also reached when the consumer stops early or fails
+                if process.poll() is None:
+                    process.kill()
+                    process.wait()
+                process.stdout.close()
+                if feeder:
+                    feeder.join()
+
+            log_file.seek(0)
+            self.log = log_file.read().decode(errors="replace")
+
+        if feeder and feeder.error:
+            raise ConversionError(f"Cannot read {member_basename(self.input_path)} from its archive: {feeder.error}")
+        if return_code != 0:
+            error_output = "\n".join(self.log.strip().splitlines()[-5:])
+            raise ConversionError(f"ffmpeg failed on {member_basename(self.input_path)}: {error_output}")
+
+
+def convert_file(input_path, outputs, clip_range=None, loudness_target=None, waveform_path=None,
+                 large_file_mode=LARGE_FILE_RF64, member=None, duration=None):
+    # outputs is a list of (profile, output_path). The source is decoded once
+    # and every block is fanned out to all profiles, so N deliverables cost
+    # one decode instead of N. Loudness, peaks and the waveform overview are
+    # collected on the same pass. Returns the output paths and the loudness stats.
+    # An output split into parts (large_file_mode) adds one path per part.
+    # duration is the expected length of the output in seconds, if known.
+    profiles = [profile for profile, _ in outputs]
+    source_format = decode_format(profiles)
+    converters = [ProfileConverter(source_format, profile) for profile in profiles]
+    decoder = Decoder(input_path, clip_range, source_format, [EBUR128_FILTER], member)
+    peak_meter = PeakMeter(source_format[1])
+    waveform_builder = WaveformBuilder(source_format) if waveform_path else None
+
+    # Writers stream to .part files next to the outputs; the input may have the same name.
+    writers = []
+    try:
+        for profile, output_path in outputs:
+            writers.append(open_writer(output_path, profile, large_file_mode, duration))
+
+        for block in decoder:
+            peak_meter.add(block)
+            if waveform_builder:
+                waveform_builder.add(block)
+            for converter, w in zip(converters, writers):
+                w.writeframesraw(converter.convert(block))
+
+        for w in writers:
+            w.close()
+
+        if peak_meter.total_samples == 0:
+            raise ConversionError(f"No audio decoded from {member_basename(input_path)}. Check the file and its range.")
+
+        integrated, true_peak = parse_ebur128_summary(decoder.log)
+        stats = {
+            "integrated": integrated,
+            "true_peak": true_peak,
+            "sample_peak": peak_meter.sample_peak_db(),
+            "clipped_samples": peak_meter.clipped_samples,
+            "gain": 0.0,
+        }
+
+        if loudness_target is not None:
+            # The gain is only known once everything went through the meter,
+            # so it is applied to the PCM we just wrote instead of decoding again.
+            stats["gain"] = normalization_gain(integrated, true_peak, loudness_target)
+            for profile, w in zip(profiles, writers):
+                for partial_path in w.temp_paths:
+                    apply_gain(partial_path, stats["gain"], profile.sample_width)
+
+        if waveform_builder:
+            waveform = waveform_builder.finish()
+            if stats["gain"]:
+                waveform = waveform.scaled(10 ** (stats["gain"] / 20))
+            try:
+                waveform.save(waveform_path)
+            except OSError as e:
+                # The overview is a cache; the conversion itself succeeded
+                print(f"Failed to save waveform overview: {e}")
+    except BaseException:
+        for w in writers:
+            w.discard()
+        raise
+
+    output_paths = []
+    for w in writers:
+        output_paths += w.commit()
+    return output_paths, stats
+
+
+def split_file(input_path, cues, profiles, output_dir, large_file_mode=LARGE_FILE_RF64, member=None):
+    # Cuts every cue into its own file(s) from one decode of the span the cues
+    # cover, however many cues there are. Returns the output paths in cue order.
+    source_format = decode_format(profiles)
+    frame_rate, sample_width, channels = source_format
+    frame_size = sample_width * channels
+    span_start, span_end = cue_span(cues)
+    decoder = Decoder(input_path, (span_start, span_end), source_format, member=member)
+
+    # Cue bounds in frames from the start of the decoded span
+    bounds = [(round((cue.start - span_start) * frame_rate), round((cue.end - span_start) * frame_rate)) for cue in cues]
+    order = sorted(range(len(cues)), key=lambda index: bounds[index][0])
+    outputs = [[(profile, os.path.join(output_dir, profile.output_file_name(cue.name))) for profile in profiles] for cue in cues]
+    frames_written = [0] * len(cues)
+    writers = [[] for _ in cues]  # Kept after closing, until they are committed
+
+    # Only cues that overlap the current block have open files
+    active = {}  # cue index -> list of (converter, writer)
+    next_cue = 0
+    position = 0
+    os.makedirs(output_dir, exist_ok=True)
+    try:
+        for block in decoder:
+            block_end = position + len(block) // frame_size
+            while next_cue < len(order) and bounds[order[next_cue]][0] < block_end:
+                index = order[next_cue]
+                for profile, output_path in outputs[index]:
+                    writers[index].append(open_writer(output_path, profile, large_file_mode,
+                                                      cues[index].end - cues[index].start))
+                active[index] = [(ProfileConverter(source_format, profile), w)
+                                 for (profile, _), w in zip(outputs[index], writers[index])]
+                next_cue += 1
+
+            for index in list(active):
+                first, last = bounds[index]
+                segment_start = max(first, position)
+                segment_end = min(last, block_end)
+                if segment_end > segment_start:
+                    segment = block[(segment_start - position) * frame_size:(segment_end - position) * frame_size]
+                    for converter, w in active[index]:
+                        w.writeframesraw(converter.convert(segment))
+                    frames_written[index] += segment_end - segment_start
+                if last <= block_end:
+                    for _, w in active.pop(index):
+                        w.close()
+            position = block_end
+
+        for index in list(active):
+            for _, w in active.pop(index):
+                w.close()
+
+        empty = [cue.name for cue, frames in zip(cues, frames_written) if frames == 0]
+        if empty:
+            raise ConversionError(f"No audio decoded for {', '.join(empty)}. Check the cue list against the file length.")
+    except BaseException:
+        for cue_writers in writers:
+            for w in cue_writers:
+                w.discard()
+        raise
+
+    output_paths = []
+    for cue_writers in writers:
+        for w in cue_writers:
+            output_paths += w.commit()
+    return output_paths
+
+
+def open_writer(path, profile, large_file_mode=LARGE_FILE_RF64, duration=None):
+    # duration (seconds, None if unknown) sizes the header; see WaveWriter
+    expected_data_size = None
+    if duration is not None:
+        expected_data_size = int(duration * profile.frame_rate) * profile.sample_width * profile.channels
+    return WaveWriter(path, profile.frame_rate, profile.sample_width, profile.channels, large_file_mode,
+                      expected_data_size=expected_data_size)
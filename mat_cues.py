@@ -0,0 +1,114 @@
+import csv
+import io
+import os
+import re
+from mat_timecode import parse_position, parse_timecode, TimecodeError
+
+# CMX3600 event line: event, reel, track, transition, [duration],
+# source in, source out, record in, record out.
+EDL_EVENT_PATTERN = re.compile(
+    r"^(\d+)\s+\S+\s+\S+\s+\S+(?:\s+\d+)?\s+"
+    r"(\d\d:\d\d:\d\d[:;.]\d\d)\s+(\d\d:\d\d:\d\d[:;.]\d\d)\s+"
+    r"\d\d:\d\d:\d\d[:;.]\d\d\s+\d\d:\d\d:\d\d[:;.]\d\d\s*$"
+)
+EDL_CLIP_NAME_PATTERN = re.compile(r"^\*\s*FROM CLIP NAME:\s*(.+)$", re.IGNORECASE)
+
+INVALID_FILE_NAME_CHARACTERS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+
+class CueError(ValueError):
+    pass
+
+
+class Cue:
+    def __init__(self, name, start, end):
+        self.name = name
+        self.start = start  # Seconds from the start of the file
+        self.end = end
+
+    def __repr__(self):
+        return f"Cue({self.name!r}, {self.start:.3f}, {self.end:.3f})"
+
+
+def load_cue_file(path, fps, start_timecode=None, default_prefix="shot"):
+    with open(path, "r", encoding="utf-8-sig") as f:
+        text = f.read()
+    if os.path.splitext(path)[1].lower() == ".edl":
+        return parse_edl(text, fps, start_timecode, default_prefix)
+    return parse_cue_csv(text, fps)
+
+
+def parse_cue_csv(text, fps):
+    # Rows of name, in, out. In and out are timecodes or frame numbers at fps.
+    # A header row and lines starting with # are skipped.
+    cues = []
+    for row_number, row in enumerate(csv.reader(io.StringIO(text)), 1):
+        if not row or not "".join(row).strip() or row[0].lstrip().startswith("#"):
+            continue
+        if len(row) < 3:
+            raise CueError(f"Line {row_number}: expected name, in, out")
+        name, start_text, end_text = (value.strip() for value in row[:3])
+        try:
+            start = parse_position(start_text, fps)
+            end = parse_position(end_text, fps)
+        except TimecodeError as e:
+            if not cues and row_number == 1:
+                continue  # Header row
+            raise CueError(f"Line {row_number}: {e}")
+        cues.append(make_cue(name or f"shot_{len(cues) + 1:03d}", start, end, row_number))
+    return finish_cues(cues)
+
+
+def parse_edl(text, fps, start_timecode=None, default_prefix="shot"):
+    # CMX3600 events cut from the source side. start_timecode is the timecode
+    # of the first sample of the file (often 01:00:00:00) and is subtracted.
+    offset = parse_timecode(start_timecode, fps) if start_timecode else 0.0
+    cues = []
+    for line_number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        match = EDL_EVENT_PATTERN.match(line)
+        if match:
+            event, start_text, end_text = match.groups()
+            # Drop-frame separators are read as non-drop timecode
+            start = parse_timecode(re.sub(r"[;.]", ":", start_text), fps) - offset
+            end = parse_timecode(re.sub(r"[;.]", ":", end_text), fps) - offset
+            cues.append(make_cue(f"{default_prefix}_{event}", start, end, line_number))
+            continue
+        match = EDL_CLIP_NAME_PATTERN.match(line)
+        if match and cues:
+            clip_name = os.path.splitext(match.group(1).strip())[0]
+            event = cues[-1].name.rsplit("_", 1)[-1]
+            cues[-1].name = f"{clip_name}_{event}"
+    return finish_cues(cues)
+
+
+def make_cue(name, start, end, line_number):
+    if start < 0:
+        raise CueError(f"Line {line_number}: the in point is before the start of the file")
+    if end <= start:
+        raise CueError(f"Line {line_number}: the out point must be after the in point")
+    name = INVALID_FILE_NAME_CHARACTERS.sub("_", name).strip(" .") or "shot"
+    return Cue(name, start, end)
+
+
+def finish_cues(cues):
+    if not cues:
+        raise CueError("No cues found")
+    # Every cue becomes its own file, so names must be unique (ignoring case,
+    # as on Windows). Later duplicates get the first free numbered suffix.
+    taken = {cue.name.lower() for cue in cues}
+    seen = set()
+    for cue in cues:
+        if cue.name.lower() in seen:
+            number = 2
+            while f"{cue.name}_{number}".lower() in taken:
+                number += 1
+            cue.name = f"{cue.name}_{number}"
+            taken.add(cue.name.lower())
+        seen.add(cue.name.lower())
+    return cues
+
+
+def cue_span(cues):
+    # The part of the file that has to be decoded
+    return min(cue.start for cue in cues), max(cue.end for cue in cues)
@@ -0,0 +1,173 @@
+import os
+import shutil
+import tarfile
+import wave
+import zipfile
+from pydub.utils import mediainfo_json
+from mat_convert import Decoder, ConversionError
+from mat_waveform import WaveformBuilder, cache_path as waveform_cache_path, PREVIEW_FRAME_RATE, PREVIEW_BUCKET_FRAMES, PREVIEW_MAX_DURATION
+from mat_archive import (is_member_path, member_basename, reads_from_start, stat_member, stored_member_range,
+                         open_member, read_wave_head, media_input, ArchiveError)
+
+# Number of files whose stat/copy/header read may be in flight at once.
+MAX_IN_FLIGHT = 16
+
+# Overview decodes running at once. They have their own pool so they never
+# hold up the metadata of rows that are still loading.
+PREVIEW_WORKERS = 2
+
+
+def new_file_meta(file_path, member=None):
+    # member is the archive entry of a member path (see list_media_members)
+    return {
+        "source_path": file_path,
+        "temp_path": None,
+        "member": member,
+        "size": None,
+        "mtime": None,
+        "duration": None,
+        "frame_rate": None,
+        "sample_width": None,
+        "channels": None,
+        "supports_maya": False,
+        "error": None,
+    }
+
+
+def gather_file_metadata(file_path, temp_dir, member=None):
+    # Everything add_file_to_treewidget needs from the disk. Runs on a pool
+    # thread and never raises; problems end up in meta["error"].
+    meta = new_file_meta(file_path, member)
+    file_type = os.path.splitext(file_path)[1][1:].lower()
+
+    if is_member_path(file_path):
+        return gather_member_metadata(file_path, meta, file_type)
+
+    try:
+        stat = os.stat(file_path)
+        meta["size"] = stat.st_size
+        meta["mtime"] = stat.st_mtime
+
+        # Copy the file to the temporary directory
+        temp_file_path = os.path.join(temp_dir, member_basename(file_path))
+        shutil.copy(file_path, temp_file_path)
+        meta["temp_path"] = temp_file_path
+    except OSError as e:
+        meta["error"] = str(e)
+        return meta
+
+    try:
+        if file_type == 'wav':
+            read_wave_header(file_path, meta)
+        else:
+            read_media_info(file_path, meta)
+    except (OSError, EOFError, wave.Error, ValueError, KeyError):
+        # Variables will remain as their default "N/A" or "No" values.
+        pass
+
+    # Check for 44.1kHz, 16bit, 2 channels, 1411kbps.
+    meta["supports_maya"] = (file_type == 'wav' and meta["frame_rate"] == 44100
+                             and meta["sample_width"] == 2 and meta["channels"] == 2)
+    return meta
+
+
+def gather_member_metadata(file_path, meta, file_type):
+    # Archive members are not copied: the decoder reads them from the archive.
+    # Listed members come with their entry, so only their contents are read,
+    # and members of a compressed tar (see reads_from_start) not even those.
+    member = meta["member"]
+    try:
+        if member is not None:
+            meta["size"], meta["mtime"] = member["size"], member["mtime"]
+        else:
+            meta["size"], meta["mtime"] = stat_member(file_path)
+        if file_type == 'wav':
+            header = member["header"] if member is not None else None
+            if header is None and not reads_from_start(file_path):
+                with open_member(file_path, member) as stream:
+                    header = read_wave_head(stream)
+            meta.update(header or {})
+        elif stored_member_range(file_path, member) is not None:
+            read_media_info(media_input(file_path, member)[0], meta)
+        # A compressed member would have to be inflated just to be probed;
+        # the scheduler estimates its cost from the size.
+    except (OSError, EOFError, wave.Error, ValueError, KeyError, ArchiveError, tarfile.TarError, zipfile.BadZipFile) as e:
+        if meta["size"] is None:
+            meta["error"] = str(e)
+            return meta
+
+    meta["supports_maya"] = (file_type == 'wav' and meta["frame_rate"] == 44100
+                             and meta["sample_width"] == 2 and meta["channels"] == 2)
+    return meta
+
+
+def read_wave_header(file_path, meta):
+    # file_path may also be an open file
+    with wave.open(file_path, 'r') as w:
+        meta["channels"] = w.getnchannels()
+        meta["sample_width"] = w.getsampwidth()
+        meta["frame_rate"] = w.getframerate()
+        if meta["frame_rate"]:
+            meta["duration"] = w.getnframes() / meta["frame_rate"]
+
+
+def read_media_info(file_path, meta):
+    # ffprobe through pydub, for the duration the scheduler uses
+    info = mediainfo_json(file_path)
+    audio_streams = [stream for stream in info.get("streams", []) if stream.get("codec_type") == "audio"]
+    if audio_streams:
+        stream = audio_streams[0]
+        meta["channels"] = int(stream["channels"]) if stream.get("channels") else None
+        meta["frame_rate"] = int(stream["sample_rate"]) if stream.get("sample_rate") else None
+        if stream.get("duration"):
+            meta["duration"] = float(stream["duration"])
+    if meta["duration"] is None and info.get("format", {}).get("duration"):
+        meta["duration"] = float(info["format"]["duration"])
+
+
+def refresh_file_metadata(meta, temp_dir):
+    # Used for items restored from a session: only a changed source (size or
+    # mtime) is copied and probed again.
+    try:
+        if is_member_path(meta["source_path"]):
+            size, mtime = stat_member(meta["source_path"])
+        else:
+            stat = os.stat(meta["source_path"])
+            size, mtime = stat.st_size, stat.st_mtime
+    except (OSError, ArchiveError) as e:
+        return dict(meta, temp_path=None, error=str(e))
+    if size != meta["size"] or mtime != meta["mtime"]:
+        return gather_file_metadata(meta["source_path"], temp_dir)
+    # Temp copies do not outlive the application; convert from the source instead
+    temp_path = meta["temp_path"] if meta["temp_path"] and os.path.exists(meta["temp_path"]) else None
+    return dict(meta, temp_path=temp_path, error=None)
+
+
+def build_waveform_preview(meta):
+    # Coarse overview for a newly added file, so its contents show before it
+    # is converted. Returns the cache path, or None if nothing could be built.
+    # An existing overview (perhaps a full-rate one from a conversion) is kept.
+    waveform_path = waveform_cache_path(meta)
+    if waveform_path is None or meta.get("error"):
+        return None
+    if os.path.exists(waveform_path):
+        return waveform_path
+    if meta.get("duration") is None or meta["duration"] > PREVIEW_MAX_DURATION:
+        return None
+    if reads_from_start(meta["source_path"]):
+        # Decoding would mean decompressing the archive up to the member
+        return None
+    source_format = (PREVIEW_FRAME_RATE, 2, 1)
+    builder = WaveformBuilder(source_format, PREVIEW_BUCKET_FRAMES)
+    try:
+        for block in Decoder(meta["temp_path"] or meta["source_path"], None, source_format, member=meta.get("member")):
+            builder.add(block)
+        if builder.total_frames == 0:
+            return None
+        # A conversion may have written the full-rate overview meanwhile
+        if not os.path.exists(waveform_path):
+            builder.finish().save(waveform_path)
+    except (ConversionError, OSError) as e:
+        print(f"Failed to build waveform overview: {e}")
+        return None
+    return waveform_path
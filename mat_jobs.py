@@ -0,0 +1,70 @@
+import os
+from mat_archive import member_basename
+from mat_convert import convert_file, split_file, PROFILES_BY_KEY
+from mat_wavwriter import LARGE_FILE_RF64
+from mat_cues import Cue
+
+# A job spec is a plain dict that only holds JSON types, so the same job can
+# run in a ConvertWorker thread or be sent to a worker daemon. Paths are
+# passed by reference; whoever runs the job must see the same file system.
+
+
+def build_job_spec(input_path, output_dir, profiles, clip_range=None, cues=None,
+                   loudness_target=None, waveform_path=None, cost=0.0, large_file_mode=LARGE_FILE_RF64,
+                   member=None, duration=None):
+    # member is the archive entry of a member input (see list_media_members),
+    # so the worker can read it without opening the archive's index again.
+    # duration is the probed length of the input in seconds, if known.
+    return {
+        "input_path": input_path,
+        "output_dir": output_dir,
+        "profiles": [profile.key for profile in profiles],
+        "clip_range": list(clip_range) if clip_range else None,
+        "cues": [[cue.name, cue.start, cue.end] for cue in cues] if cues else None,
+        "loudness_target": loudness_target,
+        "waveform_path": waveform_path,
+        "cost": cost,
+        "large_file_mode": large_file_mode,
+        "member": member,
+        "duration": duration,
+    }
+
+
+def output_duration(spec):
+    # Seconds of audio a single-output job writes, or None if unknown.
+    # Only used to size the output headers, so an upper bound will do.
+    duration = spec.get("duration")
+    if not spec.get("clip_range"):
+        return duration
+    start, end = spec["clip_range"]
+    if end is not None:
+        return end - start
+    return None if duration is None else max(0.0, duration - start)
+
+
+def run_job_spec(spec):
+    # Returns the output paths (Maya profile first, then its numbered parts
+    # if it was split) and the loudness stats, which are None for cue splits.
+    # "warning" says what was not done as asked, or is None.
+    input_path = spec["input_path"]
+    profiles = [PROFILES_BY_KEY[key] for key in spec["profiles"]]
+    base_name = os.path.splitext(member_basename(input_path))[0]
+    large_file_mode = spec.get("large_file_mode", LARGE_FILE_RF64)
+
+    if spec.get("cues"):
+        # One decode writes a WAV per shot
+        cues = [Cue(name, start, end) for name, start, end in spec["cues"]]
+        shots_dir = os.path.join(spec["output_dir"], base_name + "_shots")
+        output_paths = split_file(input_path, cues, profiles, shots_dir, large_file_mode, spec.get("member"))
+        # One loudness measurement covers the whole span, not each shot
+        warning = None
+        if spec.get("loudness_target") is not None:
+            warning = "Loudness normalization is not applied to cue splits; the shots keep their original level."
+        return {"output_paths": output_paths, "stats": None, "warning": warning}
+
+    outputs = [(profile, os.path.join(spec["output_dir"], profile.output_file_name(base_name))) for profile in profiles]
+    clip_range = tuple(spec["clip_range"]) if spec.get("clip_range") else None
+    output_paths, stats = convert_file(input_path, outputs, clip_range,
+                                       spec.get("loudness_target"), spec.get("waveform_path"), large_file_mode,
+                                       spec.get("member"), output_duration(spec))
+    return {"output_paths": output_paths, "stats": stats, "warning": None}
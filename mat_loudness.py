@@ -0,0 +1,167 @@
+import math
+import re
+import struct
+
+try:
+    import audioop
+except ImportError:
+    import pyaudioop as audioop
+
+# ffmpeg filter that measures EBU R128 / BS.1770 loudness and true peak while
+# the audio passes through it. Per-frame lines are logged at verbose level so
+# only the summary reaches the info log.
+EBUR128_FILTER = "ebur128=peak=true:framelog=verbose"
+
+# Normalization presets in LUFS, in menu order.
+LOUDNESS_TARGETS = [
+    ("EBU R128 (-23 LUFS)", -23.0),
+    ("ATSC A/85 (-24 LUFS)", -24.0),
+    ("Streaming (-16 LUFS)", -16.0),
+]
+
+# Normalization never raises the true peak above this.
+TRUE_PEAK_CEILING = -1.0
+
+# Amount of PCM read and written at a time when applying gain in place.
+GAIN_BLOCK_SIZE = 1024 * 1024
+
+INTEGRATED_PATTERN = re.compile(r"I:\s+(-?[\d.]+|-inf) LUFS")
+TRUE_PEAK_PATTERN = re.compile(r"Peak:\s+(-?[\d.]+|-inf) dBFS")
+
+
+def parse_ebur128_summary(log_text):
+    # Reads the summary ffmpeg prints when the ebur128 filter closes.
+    integrated = None
+    true_peak = None
+    summary_start = log_text.rfind("Summary:")
+    if summary_start != -1:
+        summary = log_text[summary_start:]
+        match = INTEGRATED_PATTERN.search(summary)
+        if match:
+            integrated = float(match.group(1))
+        peak_start = summary.find("True peak:")
+        if peak_start != -1:
+            match = TRUE_PEAK_PATTERN.search(summary, peak_start)
+            if match:
+                true_peak = float(match.group(1))
+    return integrated, true_peak
+
+
+def to_db(linear):
+    if linear <= 0:
+        return float("-inf")
+    return 20 * math.log10(linear)
+
+
+class PeakMeter:
+    # Sample peak and clipping on the decoded blocks. audioop and array do
+    # the per-sample work; no sample is looked at from Python.
+    def __init__(self, sample_width):
+        self.sample_width = sample_width
+        self.full_scale = 2 ** (8 * sample_width - 1)
+        # 16bit full scale, so clipped 16bit sources are caught in wider formats too
+        self.clip_level = self.full_scale - (self.full_scale >> 15)
+        self.peak = 0
+        self.clipped_samples = 0
+        self.total_samples = 0
+
+    def add(self, block):
+        width = self.sample_width
+        self.total_samples += len(block) // width
+        block_peak = audioop.max(block, width)
+        self.peak = max(self.peak, block_peak)
+        if block_peak >= self.clip_level:
+            self.clipped_samples += self.count_clipped(block)
+
+    def count_clipped(self, block):
+        # Samples at or beyond the clip level, either sign. The level is 16bit
+        # full scale, so in terms of the top two bytes of a sample it clips at
+        # 7F FF, at 80 00, and at 80 01 with all lower bytes zero. Each test
+        # turns one byte lane into a 0/1 mask through bytes.translate; the
+        # masks are combined as big integers, so no sample goes through Python.
+        width = self.sample_width
+        lanes = [block[index::width] for index in range(width)]
+        high, second = lanes[-1], lanes[-2]
+        positive = byte_mask(high, 0x7F) & byte_mask(second, 0xFF)
+        exact = byte_mask(second, 0x01)
+        for lane in lanes[:-2]:
+            exact &= byte_mask(lane, 0x00)
+        negative = byte_mask(high, 0x80) & (byte_mask(second, 0x00) | exact)
+        return (positive | negative).bit_count()
+
+    def sample_peak_db(self):
+        return to_db(self.peak / self.full_scale)
+
+
+# bytes.translate tables that map one byte value to 1 and all others to 0
+BYTE_EQUALS = [bytes(int(byte == value) for byte in range(256)) for value in range(256)]
+
+
+def byte_mask(lane, value):
+    # Integer with bit 8n set where lane[n] == value, and no other bits
+    return int.from_bytes(lane.translate(BYTE_EQUALS[value]), "little")
+
+
+def normalization_gain(integrated, true_peak, target, ceiling=TRUE_PEAK_CEILING):
+    # Gain in dB that brings the integrated loudness to the target without
+    # pushing the true peak over the ceiling.
+    if integrated is None or math.isinf(integrated) or integrated <= -70.0:
+        return 0.0  # Silence or nothing measured
+    gain = target - integrated
+    if true_peak is not None and not math.isinf(true_peak):
+        gain = min(gain, ceiling - true_peak)
+    return gain
+
+
+def find_data_chunk(f):
+    # Returns (offset, size) of the PCM data in a RIFF/WAVE or RF64 file.
+    f.seek(0)
+    riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+    if riff not in (b"RIFF", b"RF64") or wave_id != b"WAVE":
+        raise ValueError("Not a RIFF/WAVE file")
+    ds64_data_size = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            raise ValueError("No data chunk found")
+        chunk_id, chunk_size = struct.unpack("<4sI", header)
+        if chunk_id == b"ds64":
+            # 64-bit sizes: riff size, data size, ...
+            ds64_data_size = struct.unpack("<QQ", f.read(16))[1]
+            f.seek(chunk_size - 16, 1)
+            continue
+        if chunk_id == b"data":
+            if chunk_size == 0xFFFFFFFF and ds64_data_size is not None:
+                chunk_size = ds64_data_size
+            return f.tell(), chunk_size
+        f.seek(chunk_size + (chunk_size & 1), 1)
+
+
+def apply_gain(path, gain_db, sample_width):
+    # Scales the samples of a WAV file we wrote ourselves, in place.
+    # Only PCM is read back; the source is not decoded again.
+    if abs(gain_db) < 0.01:
+        return
+    factor = 10 ** (gain_db / 20)
+    # Keep reads aligned to whole samples
+    block_size = GAIN_BLOCK_SIZE - GAIN_BLOCK_SIZE % sample_width
+    with open(path, "r+b") as f:
+        offset, size = find_data_chunk(f)
+        end = offset + size
+        position = offset
+        while position < end:
+            f.seek(position)
+            block = f.read(min(block_size, end - position))
+            if not block:
+                break
+            f.seek(position)
+            f.write(audioop.mul(block, sample_width, factor))
+            position += len(block)
+
+
+def format_loudness(value, unit):
+    if value is None:
+        return "N/A"
+    if math.isinf(value):
+        return f"-inf {unit}"
+    return f"{value:.1f} {unit}"
@@ -0,0 +1,214 @@
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+# The sampler looks at every thread this often. Conversions run on QThreads
+# and metadata on a pool, which a per-thread cProfile would not see.
+SAMPLE_INTERVAL = 0.005
+TRACEMALLOC_FRAMES = 8
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 20
+TOP_PHASE_FUNCTIONS = 10
+
+# The phases of a batch that are timed
+PHASE_INGEST = "ingest"
+PHASE_CONVERT = "convert"
+PHASE_DOWNLOAD = "download"
+
+
+def default_report_path(folder=None):
+    file_name = datetime.now().strftime("mat-profile-%Y%m%d-%H%M%S.txt")
+    return os.path.join(folder or os.getcwd(), file_name)
+
+
+class PhaseTimes:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.longest = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.longest = max(self.longest, seconds)
+
+
+class Profiler:
+    # One profiler for the whole application. phase() is cheap while the
+    # profiler is stopped, so the phases can stay marked in the code.
+    def __init__(self):
+        self.running = False
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.started = None
+        self.stopped = None
+        self.sample_count = 0
+        self.self_samples = Counter()        # Function at the top of the stack
+        self.total_samples = Counter()       # Function anywhere on the stack
+        self.phase_samples = defaultdict(Counter)
+        self.phase_times = defaultdict(PhaseTimes)
+        self.thread_phases = {}              # Thread id -> current phase
+        self.snapshots = []                  # (label, tracemalloc snapshot)
+        self.peak_traced = 0
+
+    def start(self):
+        if self.running:
+            return
+        self.reset()
+        self.running = True
+        self.started = time.perf_counter()
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        self.take_snapshot("start")
+        self.sampler = threading.Thread(target=self.sample_threads, name="mat-profiler", daemon=True)
+        self.sampler.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.take_snapshot("stop")
+        self.running = False
+        self.sampler.join()
+        self.stopped = time.perf_counter()
+        self.peak_traced = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    @contextmanager
+    def phase(self, name):
+        if not self.running:
+            yield
+            return
+        thread_id = threading.get_ident()
+        previous = self.thread_phases.get(thread_id)
+        self.thread_phases[thread_id] = name
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.phase_times[name].add(elapsed)
+            if previous is None:
+                self.thread_phases.pop(thread_id, None)
+            else:
+                self.thread_phases[thread_id] = previous
+
+    def call(self, name, function, *args):
+        # For work submitted to a pool
+        with self.phase(name):
+            return function(*args)
+
+    def take_snapshot(self, label):
+        # Kept for the allocation hot spots; each call adds a little overhead.
+        # Only the latest snapshot per label is kept (a phase like ingest
+        # ends every time files are added), so memory stays bounded.
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ])
+            self.snapshots = [(kept_label, kept) for kept_label, kept in self.snapshots if kept_label != label]
+            self.snapshots.append((label, snapshot))
+
+    def sample_threads(self):
+        own_id = threading.get_ident()
+        while self.running:
+            time.sleep(SAMPLE_INTERVAL)
+            frames = sys._current_frames()
+            with self.lock:
+                self.sample_count += 1
+                for thread_id, frame in frames.items():
+                    # Idle threads (event loops, pool queues) are left out
+                    phase = self.thread_phases.get(thread_id)
+                    if thread_id != own_id and phase is not None:
+                        self.add_stack(frame, phase)
+
+    def add_stack(self, frame, phase):
+        self.self_samples[frame_label(frame)] += 1
+        seen = set()
+        while frame is not None:
+            label = frame_label(frame)
+            if label not in seen:
+                seen.add(label)
+                self.total_samples[label] += 1
+                self.phase_samples[phase][label] += 1
+            frame = frame.f_back
+
+    def write_report(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.format_report())
+        return path
+
+    def format_report(self):
+        end = self.stopped if self.stopped is not None else time.perf_counter()
+        duration = end - self.started if self.started is not None else 0.0
+        lines = [
+            "MAT profiling report",
+            f"Created: {datetime.now():%Y-%m-%d %H:%M:%S}",
+            f"Python {platform.python_version()} on {platform.platform()}, {os.cpu_count()} CPU(s)",
+            f"Profiled for {duration:.1f} s, {self.sample_count} samples every {SAMPLE_INTERVAL * 1000:.0f} ms",
+            "Percentages are per sample and add up over threads working at the same time.",
+            "",
+            "Phase timings",
+            f"  {'Phase':<12}{'Count':>8}{'Total s':>12}{'Mean s':>10}{'Longest s':>12}",
+        ]
+        for name, times in sorted(self.phase_times.items()):
+            mean = times.total / times.count if times.count else 0.0
+            lines.append(f"  {name:<12}{times.count:>8}{times.total:>12.2f}{mean:>10.3f}{times.longest:>12.3f}")
+        if not self.phase_times:
+            lines.append("  (no phase was run)")
+
+        with self.lock:
+            lines += ["", "Top functions (samples at the top of the stack)"]
+            lines += format_counts(self.self_samples, self.sample_count, TOP_FUNCTIONS)
+            lines += ["", "Top functions (samples anywhere on the stack)"]
+            lines += format_counts(self.total_samples, self.sample_count, TOP_FUNCTIONS)
+            for name, samples in sorted(self.phase_samples.items()):
+                lines += ["", f"Phase '{name}' (samples anywhere on the stack)"]
+                lines += format_counts(samples, self.sample_count, TOP_PHASE_FUNCTIONS)
+
+        lines += ["", f"Allocations (tracemalloc, peak {format_bytes(self.peak_traced)})"]
+        if len(self.snapshots) >= 2:
+            lines.append("  Still allocated at the end, by line:")
+            for stat in self.snapshots[-1][1].statistics("lineno")[:TOP_ALLOCATIONS]:
+                lines.append(f"  {format_bytes(stat.size):>10} {stat.count:>8} blocks  {stat.traceback[0]}")
+            # Growth between snapshots, which are taken when a phase of a batch ends
+            for (before_label, before), (label, after) in zip(self.snapshots, self.snapshots[1:]):
+                lines.append(f"  Growth from '{before_label}' to '{label}', by line:")
+                for stat in after.compare_to(before, "lineno")[:TOP_PHASE_FUNCTIONS]:
+                    lines.append(f"  {format_bytes(stat.size_diff):>10} {stat.count_diff:>+8} blocks  {stat.traceback[0]}")
+        else:
+            lines.append("  (no snapshots)")
+        return "\n".join(lines) + "\n"
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def format_counts(counter, sample_count, limit):
+    if not counter:
+        return ["  (no samples)"]
+    return [f"  {count:>8} {count * 100.0 / max(1, sample_count):>6.1f}%  {label}"
+            for label, count in counter.most_common(limit)]
+
+
+def format_bytes(size):
+    sign = "-" if size < 0 else ""
+    size = abs(size)
+    for unit in ["B", "KB", "MB"]:
+        if size < 1024:
+            return f"{sign}{size:.0f} {unit}"
+        size /= 1024
+    return f"{sign}{size:.1f} GB"
+
+
+profiler = Profiler()
@@ -0,0 +1,242 @@
+import heapq
+import os
+import threading
+from collections import deque
+
+try:
+    import psutil
+except ImportError:
+    psutil = None  # Admission then relies on the estimates alone
+
+# Throughput assumed for files whose duration has not been probed yet
+# (uncompressed 44.1kHz, 16bit, 2 channels).
+DEFAULT_BYTES_PER_SECOND = 44100 * 2 * 2
+
+# Peak memory model of one streaming conversion: the ffmpeg process, one
+# decoded block per output (plus the raw block), and the waveform pyramid,
+# which grows with the length of the file.
+DECODER_OVERHEAD_BYTES = 64 * 1024 * 1024
+BLOCK_SECONDS = 1
+DECODE_SAMPLE_WIDTH = 4
+WAVEFORM_BUCKET_FRAMES = 256
+DEFAULT_FRAME_RATE = 44100
+DEFAULT_CHANNELS = 2
+
+# Without a known amount of RAM, a budget that is safe on small machines.
+DEFAULT_MEMORY_BUDGET = 2 * 1024 * 1024 * 1024
+
+# Observed usage above/below these parts of the budget shrinks/grows concurrency.
+MEMORY_HIGH_WATER = 0.9
+MEMORY_LOW_WATER = 0.7
+# System CPU use (percent) at which more workers no longer add throughput.
+# Concurrency stops growing there; it is not reduced, saturation is the goal.
+CPU_SATURATED = 95.0
+
+POLICY_AUTO = "auto"
+POLICY_LIST_ORDER = "list_order"
+POLICY_SHORTEST_FIRST = "shortest_first"
+POLICY_LONGEST_FIRST = "longest_first"
+
+# Policies that can be compared against each other, in menu order.
+POLICIES = [POLICY_LIST_ORDER, POLICY_SHORTEST_FIRST, POLICY_LONGEST_FIRST]
+
+POLICY_NAMES = {
+    POLICY_AUTO: "Auto (Best Makespan)",
+    POLICY_LIST_ORDER: "List Order",
+    POLICY_SHORTEST_FIRST: "Shortest First",
+    POLICY_LONGEST_FIRST: "Longest First",
+}
+
+
+def estimate_cost(meta, clip_range=None):
+    # Estimated conversion cost in seconds of media.
+    # Prefer the probed duration, fall back to the file size.
+    cost = 0.0
+    if meta:
+        if meta.get("duration"):
+            cost = float(meta["duration"])
+        elif meta.get("size"):
+            cost = meta["size"] / DEFAULT_BYTES_PER_SECOND
+
+    # Only the selected range is decoded
+    if clip_range:
+        start, end = clip_range
+        if end is not None:
+            cost = min(cost, end - start) if cost else end - start
+        else:
+            cost = max(0.0, cost - start)
+    return cost
+
+
+def estimate_memory(meta, clip_range=None, outputs=1):
+    # Estimated peak memory of one conversion in bytes.
+    frame_rate = (meta or {}).get("frame_rate") or DEFAULT_FRAME_RATE
+    channels = (meta or {}).get("channels") or DEFAULT_CHANNELS
+    frames_per_second = frame_rate * channels
+    block_bytes = frames_per_second * DECODE_SAMPLE_WIDTH * BLOCK_SECONDS * (1 + outputs)
+    # Two bytes (min and max) per bucket and channel, about twice that for all levels
+    seconds = estimate_cost(meta, clip_range)
+    waveform_bytes = seconds * frames_per_second / WAVEFORM_BUCKET_FRAMES * 2 * 2
+    return int(DECODER_OVERHEAD_BYTES + block_bytes + waveform_bytes)
+
+
+def default_memory_budget():
+    # A quarter of the physical memory, leaving room for everything else
+    if psutil is not None:
+        return psutil.virtual_memory().total // 4
+    return DEFAULT_MEMORY_BUDGET
+
+
+class Job:
+    def __init__(self, item, cost, priority=0, index=0, memory=0):
+        self.item = item
+        self.cost = cost
+        self.priority = priority  # Pinned jobs have a higher priority
+        self.index = index        # Position in the list, used to keep ties stable
+        self.memory = memory      # Estimated peak memory in bytes
+        self.spec = None          # mat_jobs spec; None when there is nothing to convert
+
+
+def order_jobs(jobs, policy):
+    if policy == POLICY_SHORTEST_FIRST:
+        key = lambda job: (-job.priority, job.cost, job.index)
+    elif policy == POLICY_LONGEST_FIRST:
+        key = lambda job: (-job.priority, -job.cost, job.index)
+    else:
+        key = lambda job: (-job.priority, job.index)
+    return sorted(jobs, key=key)
+
+
+def simulate_makespan(ordered_jobs, workers):
+    # Each idle worker takes the next job in order, like ConvertWorker does.
+    finish_times = [0.0] * max(1, workers)
+    for job in ordered_jobs:
+        start = heapq.heappop(finish_times)
+        heapq.heappush(finish_times, start + job.cost)
+    return max(finish_times)
+
+
+def compare_policies(jobs, workers):
+    return {policy: simulate_makespan(order_jobs(jobs, policy), workers) for policy in POLICIES}
+
+
+def best_policy(jobs, workers):
+    makespans = compare_policies(jobs, workers)
+    # min() keeps the first policy on ties, so list order wins when nothing is gained.
+    return min(POLICIES, key=lambda policy: makespans[policy])
+
+
+def format_makespan_summary(jobs, workers, chosen_policy):
+    # One line for the status bar
+    makespan = simulate_makespan(order_jobs(jobs, chosen_policy), workers)
+    return f"Schedule: {POLICY_NAMES[chosen_policy]}, estimated {makespan:.1f} s for {len(jobs)} file(s) on {workers} worker(s)"
+
+
+def format_makespan_report(jobs, workers, chosen_policy):
+    lines = [f"Estimated makespan for {len(jobs)} file(s) on {workers} worker(s):"]
+    for policy, makespan in compare_policies(jobs, workers).items():
+        marker = " <- selected" if policy == chosen_policy else ""
+        lines.append(f"  {POLICY_NAMES[policy]}: {makespan:.1f} s{marker}")
+    return "\n".join(lines)
+
+
+class JobQueue:
+    # Thread-safe queue shared by all ConvertWorkers of one batch.
+    # Jobs are admitted while their estimated memory fits in the budget and
+    # fewer than `limit` jobs run; the limit follows the observed usage.
+    # `workers` is how many may run at most. The policy and the makespan
+    # estimates use the limit the batch starts with, which is what runs.
+    def __init__(self, jobs, policy=POLICY_AUTO, workers=1, memory_budget=None, limit=None):
+        self.workers = workers
+        self.limit = min(limit or workers, workers)
+        if policy == POLICY_AUTO:
+            policy = best_policy(jobs, self.limit)
+        self.policy = policy
+        self.total = len(jobs)
+        self.memory_budget = memory_budget  # Bytes, None admits everything
+        self.report = format_makespan_report(jobs, self.limit, policy)
+        self.summary = format_makespan_summary(jobs, self.limit, policy)
+        self._jobs = deque(order_jobs(jobs, policy))
+        self._running = 0
+        self._reserved = 0   # Estimated memory of the running jobs
+        self._observed = 0   # Measured memory of the conversions, from adapt()
+        self._done = 0
+        self._condition = threading.Condition()
+
+    def next_job(self):
+        # Blocks until a job can be admitted; None when every job was handed out.
+        with self._condition:
+            while self._jobs:
+                position = self._admissible_position()
+                if position is not None:
+                    job = self._jobs[position]
+                    del self._jobs[position]
+                    self._running += 1
+                    self._reserved += job.memory
+                    return job
+                self._condition.wait()
+            return None
+
+    def _admissible_position(self):
+        if self._running >= self.limit:
+            return None
+        if self.memory_budget is None or self._running == 0:
+            # A job larger than the whole budget still runs, on its own
+            return 0
+        available = self.memory_budget - max(self._reserved, self._observed)
+        # The first job in order that fits; small files fill in around a large one
+        for position, job in enumerate(self._jobs):
+            if job.memory <= available:
+                return position
+        return None
+
+    def mark_done(self, job):
+        # Returns the number of finished jobs across all workers.
+        with self._condition:
+            self._running -= 1
+            self._reserved -= job.memory
+            self._done += 1
+            self._condition.notify_all()
+            return self._done
+
+    def adapt(self, used_memory, cpu_percent):
+        # Called periodically with the measured memory of the conversions and
+        # the system CPU use. Returns the new concurrency limit.
+        with self._condition:
+            self._observed = used_memory
+            budget = self.memory_budget
+            if budget is not None and used_memory > budget * MEMORY_HIGH_WATER:
+                self.limit = max(1, self.limit - 1)
+            elif cpu_percent >= CPU_SATURATED:
+                pass  # Hold: more workers would not help, fewer would idle CPUs
+            elif self.limit < self.workers and (budget is None or used_memory < budget * MEMORY_LOW_WATER):
+                self.limit += 1
+            self._condition.notify_all()
+            return self.limit
+
+
+class ResourceSampler:
+    # Measures this process and its children (the ffmpeg decoders).
+    # Only available with psutil installed.
+    def __init__(self):
+        self.process = psutil.Process(os.getpid()) if psutil is not None else None
+        self.baseline = self.rss() if self.process is not None else 0
+        if self.process is not None:
+            psutil.cpu_percent(None)  # The first call only starts the interval
+
+    @property
+    def available(self):
+        return self.process is not None
+
+    def rss(self):
+        total = self.process.memory_info().rss
+        for child in self.process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass  # The decoder exited in the meantime
+        return total
+
+    def sample(self):
+        # Memory used since the batch started and the system CPU use in percent
+        return max(0, self.rss() - self.baseline), psutil.cpu_percent(None)
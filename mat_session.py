@@ -0,0 +1,193 @@
+import math
+import mmap
+import os
+import struct
+
+# Session file layout (little endian):
+#   header   magic, version, reserved, record count, records offset, strings offset
+#   records  fixed size, so any record can be read from the mapped file directly
+#   strings  UTF-8 string table the records point into with (offset, length)
+SESSION_MAGIC = b"MATS"
+SESSION_VERSION = 1
+HEADER = struct.Struct("<4sHHIQQ")
+RECORD = struct.Struct(
+    "<"
+    "IIIIIIIIII"      # columns, source, temp, outputs, cues as (offset, length)
+    "Qd"              # size, mtime
+    "dIBBH"           # duration, frame rate, sample width, channels, flags
+    "dd"              # range start, range end
+    "dddQd"           # integrated, true peak, sample peak, clipped samples, gain
+)
+
+FLAG_CONVERTED = 1
+FLAG_PINNED = 2
+FLAG_SUPPORTS_MAYA = 4
+FLAG_HAS_RANGE = 8
+FLAG_HAS_STATS = 16
+
+UNKNOWN_SIZE = 0xFFFFFFFFFFFFFFFF
+
+
+class SessionError(Exception):
+    pass
+
+
+def _number(value):
+    return math.nan if value is None else float(value)
+
+
+def _optional(value):
+    return None if math.isnan(value) else value
+
+
+class StringTable:
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = {}
+
+    def add(self, text):
+        if not text:
+            return 0, 0
+        if text not in self.offsets:
+            encoded = text.encode("utf-8")
+            self.offsets[text] = (len(self.data), len(encoded))
+            self.data += encoded
+        return self.offsets[text]
+
+
+def write_session(path, records):
+    # records are dicts as returned by SessionReader.record().
+    strings = StringTable()
+    packed = bytearray()
+    for record in records:
+        meta = record["meta"]
+        stats = record["stats"]
+        clip_range = record["clip_range"]
+        flags = 0
+        if record["converted"]:
+            flags |= FLAG_CONVERTED
+        if record["pinned"]:
+            flags |= FLAG_PINNED
+        if meta.get("supports_maya"):
+            flags |= FLAG_SUPPORTS_MAYA
+        if clip_range:
+            flags |= FLAG_HAS_RANGE
+        if stats:
+            flags |= FLAG_HAS_STATS
+        cues_text = "\n".join(f"{name}\t{start!r}\t{end!r}" for name, start, end in record["cues"] or [])
+
+        packed += RECORD.pack(
+            *strings.add("\0".join(record["columns"])),
+            *strings.add(meta.get("source_path")),
+            *strings.add(meta.get("temp_path")),
+            *strings.add("\0".join(record["output_paths"])),
+            *strings.add(cues_text),
+            UNKNOWN_SIZE if meta.get("size") is None else meta["size"],
+            _number(meta.get("mtime")),
+            _number(meta.get("duration")),
+            meta.get("frame_rate") or 0,
+            meta.get("sample_width") or 0,
+            meta.get("channels") or 0,
+            flags,
+            clip_range[0] if clip_range else math.nan,
+            _number(clip_range[1]) if clip_range else math.nan,
+            _number(stats["integrated"]) if stats else math.nan,
+            _number(stats["true_peak"]) if stats else math.nan,
+            _number(stats["sample_peak"]) if stats else math.nan,
+            stats["clipped_samples"] if stats else 0,
+            stats["gain"] if stats else 0.0,
+        )
+
+    records_offset = HEADER.size
+    strings_offset = records_offset + len(packed)
+    partial_path = path + ".part"
+    with open(partial_path, "wb") as f:
+        f.write(HEADER.pack(SESSION_MAGIC, SESSION_VERSION, 0, len(packed) // RECORD.size, records_offset, strings_offset))
+        f.write(packed)
+        f.write(strings.data)
+    os.replace(partial_path, path)
+
+
+class SessionReader:
+    # Maps the session file and decodes records on demand, so opening does
+    # not depend on the number of items.
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            if os.fstat(self.file.fileno()).st_size < HEADER.size:
+                raise SessionError("Not a MAT session file")
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, SessionError):
+            self.file.close()
+            raise
+
+        magic, version, _, self.count, self.records_offset, self.strings_offset = HEADER.unpack_from(self.map)
+        if magic != SESSION_MAGIC:
+            self.close()
+            raise SessionError("Not a MAT session file")
+        if version != SESSION_VERSION:
+            self.close()
+            raise SessionError(f"Unsupported session version {version}")
+        if self.records_offset + self.count * RECORD.size > len(self.map):
+            self.close()
+            raise SessionError("The session file is truncated")
+
+    def __len__(self):
+        return self.count
+
+    def string(self, offset, length):
+        start = self.strings_offset + offset
+        return self.map[start:start + length].decode("utf-8")
+
+    def record(self, index):
+        values = RECORD.unpack_from(self.map, self.records_offset + index * RECORD.size)
+        columns, source_path, temp_path, outputs, cues_text = (
+            self.string(values[i], values[i + 1]) for i in range(0, 10, 2))
+        (size, mtime, duration, frame_rate, sample_width, channels, flags,
+         range_start, range_end, integrated, true_peak, sample_peak, clipped, gain) = values[10:]
+
+        meta = {
+            "source_path": source_path,
+            "temp_path": temp_path or None,
+            "member": None,
+            "size": None if size == UNKNOWN_SIZE else size,
+            "mtime": _optional(mtime),
+            "duration": _optional(duration),
+            "frame_rate": frame_rate or None,
+            "sample_width": sample_width or None,
+            "channels": channels or None,
+            "supports_maya": bool(flags & FLAG_SUPPORTS_MAYA),
+            "error": None,
+        }
+        cues = None
+        if cues_text:
+            cues = []
+            for line in cues_text.split("\n"):
+                cue_name, start, end = line.split("\t")
+                cues.append((cue_name, float(start), float(end)))
+        stats = None
+        if flags & FLAG_HAS_STATS:
+            stats = {
+                "integrated": _optional(integrated),
+                "true_peak": _optional(true_peak),
+                "sample_peak": _optional(sample_peak),
+                "clipped_samples": clipped,
+                "gain": gain,
+            }
+        return {
+            "columns": columns.split("\0"),  # Texts of the list columns 1 to 7
+            "converted": bool(flags & FLAG_CONVERTED),
+            "pinned": bool(flags & FLAG_PINNED),
+            "output_paths": outputs.split("\0") if outputs else [],
+            "clip_range": (range_start, _optional(range_end)) if flags & FLAG_HAS_RANGE else None,
+            "cues": cues,
+            "stats": stats,
+            "meta": meta,
+        }
+
+    def close(self):
+        if getattr(self, "map", None) is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
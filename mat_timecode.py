@@ -0,0 +1,98 @@
+import re
+
+# Accepted forms:
+#   90.5              seconds
+#   01:30.5           minutes:seconds
+#   00:01:30.500      hours:minutes:seconds
+#   00:01:30:12@24    hours:minutes:seconds:frames at a frame rate
+#   2172@24           frame number at a frame rate
+TIMECODE_PATTERN = re.compile(r"^(?:(\d+):)?(?:(\d+):)?(\d+(?:\.\d+)?)(?::(\d+))?$")
+
+
+class TimecodeError(ValueError):
+    pass
+
+
+def parse_fps(text):
+    try:
+        fps = float(text)
+    except ValueError:
+        raise TimecodeError(f"Invalid frame rate: '{text}'")
+    if fps <= 0:
+        raise TimecodeError(f"Frame rate must be positive: '{text}'")
+    return fps
+
+
+def parse_timecode(text, fps=None):
+    # Returns the position in seconds.
+    text = text.strip()
+    if "@" in text:
+        text, fps_text = text.rsplit("@", 1)
+        fps = parse_fps(fps_text.strip())
+        text = text.strip()
+        if text.isdigit():
+            return int(text) / fps
+
+    match = TIMECODE_PATTERN.match(text)
+    if not match:
+        raise TimecodeError(f"Invalid timecode: '{text}'")
+    hours, minutes, seconds, frames = match.groups()
+    if minutes is None and hours is not None:
+        # "MM:SS" is matched with the first group only
+        hours, minutes = None, hours
+
+    position = float(seconds) + int(minutes or 0) * 60 + int(hours or 0) * 3600
+    if frames is not None:
+        if fps is None:
+            raise TimecodeError(f"Timecode with frames needs a frame rate: '{text}@24'")
+        # Timecode counts frames at the nominal rate (24 for 23.976, 30 for
+        # 29.97, non-drop-frame), so it is a frame number in disguise: the
+        # same position as "<frame number>@fps".
+        nominal_fps = round(fps)
+        if int(frames) >= nominal_fps:
+            raise TimecodeError(f"Frame {frames} is out of range for {fps:g} fps")
+        return (position * nominal_fps + int(frames)) / fps
+    return position
+
+
+def parse_range(text, fps=None):
+    # "IN-OUT" or "IN" (to the end of the file). Returns (start, end or None).
+    # The fps suffix of either side applies to both, e.g. "100-340@24".
+    text = text.strip()
+    if "@" in text and fps is None:
+        text, fps_text = text.rsplit("@", 1)
+        fps = parse_fps(fps_text.strip())
+    parts = text.split("-")
+    if len(parts) > 2 or not parts[0].strip():
+        raise TimecodeError(f"Invalid range: '{text}'")
+
+    start = parse_position(parts[0], fps)
+    end = None
+    if len(parts) == 2 and parts[1].strip():
+        end = parse_position(parts[1], fps)
+        if end <= start:
+            raise TimecodeError("The out point must be after the in point.")
+    return start, end
+
+
+def parse_position(text, fps=None):
+    text = text.strip()
+    if fps is not None and text.isdigit():
+        # A bare number with a frame rate is a frame number
+        return int(text) / fps
+    return parse_timecode(text, fps)
+
+
+def format_timecode(seconds):
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{seconds:06.3f}"
+
+
+def format_range(clip_range):
+    if not clip_range:
+        return "Full"
+    start, end = clip_range
+    if end is None:
+        return f"{format_timecode(start)} - End"
+    return f"{format_timecode(start)} - {format_timecode(end)}"
@@ -0,0 +1,202 @@
+import array
+import hashlib
+import os
+import struct
+import threading
+import time
+
+try:
+    import audioop
+except ImportError:
+    import pyaudioop as audioop
+
+# Frames summarized by one min/max pair in the finest level.
+BASE_BUCKET_FRAMES = 256
+
+# Levels are halved until they are this short.
+MIN_LEVEL_LENGTH = 16
+
+# Quick overview built while a file is added: a low-rate mono decode. The
+# conversion replaces it with a full-rate one.
+PREVIEW_FRAME_RATE = 8000
+PREVIEW_BUCKET_FRAMES = 64
+# Longer sources (or ones of unknown length) only get the overview of their conversion
+PREVIEW_MAX_DURATION = 30 * 60
+
+# Cached overviews are removed past this age, oldest first past this size.
+CACHE_MAX_AGE = 90 * 24 * 60 * 60
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+CACHE_MAGIC = b"MATW"
+CACHE_VERSION = 1
+# magic, version, level count, bucket frames, frame rate, total frames
+CACHE_HEADER = struct.Struct("<4sHHIIQ")
+LEVEL_HEADER = struct.Struct("<I")
+
+
+def cache_dir():
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "mat", "waveforms")
+
+
+def cache_path(meta, clip_range=None):
+    # The overview belongs to the source as it was when it was added;
+    # a changed size or mtime gives a different file.
+    if not meta or not meta.get("source_path"):
+        return None
+    key = f"{os.path.abspath(meta['source_path'])}|{meta.get('size')}|{meta.get('mtime')}|{clip_range}"
+    return os.path.join(cache_dir(), hashlib.sha1(key.encode("utf-8")).hexdigest() + ".matw")
+
+
+def prune_cache(max_bytes=CACHE_MAX_BYTES, max_age=CACHE_MAX_AGE):
+    # Loading an overview touches its file, so the least recently used go first.
+    try:
+        entries = [entry for entry in os.scandir(cache_dir()) if entry.is_file()]
+    except OSError:
+        return 0
+    files = []
+    for entry in entries:
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, entry.path))
+    files.sort()
+
+    now = time.time()
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for mtime, size, path in files:
+        if total <= max_bytes and now - mtime <= max_age:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+class WaveformPyramid:
+    # levels[0] is the finest; every level interleaves (min, max) pairs as int8.
+    def __init__(self, levels, bucket_frames, frame_rate, total_frames):
+        self.levels = levels
+        self.bucket_frames = bucket_frames
+        self.frame_rate = frame_rate
+        self.total_frames = total_frames
+
+    def columns(self, width):
+        # (min, max) pairs for a drawing `width` pixels wide, taken from the
+        # coarsest level that still has at least one pair per pixel.
+        if width <= 0 or not self.levels or not self.levels[0]:
+            return []
+        level = self.levels[0]
+        for candidate in self.levels:
+            if len(candidate) // 2 >= width:
+                level = candidate
+        pairs = len(level) // 2
+        result = []
+        for x in range(width):
+            first = x * pairs // width
+            last = max(first + 1, (x + 1) * pairs // width)
+            result.append((min(level[first * 2:last * 2:2]), max(level[first * 2 + 1:last * 2:2])))
+        return result
+
+    def scaled(self, factor):
+        levels = []
+        for level in self.levels:
+            levels.append(array.array('b', (max(-127, min(127, int(round(value * factor)))) for value in level)))
+        return WaveformPyramid(levels, self.bucket_frames, self.frame_rate, self.total_frames)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique per writer: a preview and a conversion may save the same overview
+        partial_path = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        with open(partial_path, "wb") as f:
+            f.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, len(self.levels),
+                                      self.bucket_frames, self.frame_rate, self.total_frames))
+            for level in self.levels:
+                f.write(LEVEL_HEADER.pack(len(level) // 2))
+                f.write(level.tobytes())
+        os.replace(partial_path, path)
+
+    @classmethod
+    def load(cls, path):
+        # Returns None when there is no usable cache file.
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # Recently used, for prune_cache()
+        except OSError:
+            return None
+        if len(data) < CACHE_HEADER.size:
+            return None
+        magic, version, level_count, bucket_frames, frame_rate, total_frames = CACHE_HEADER.unpack_from(data)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION:
+            return None
+        levels = []
+        offset = CACHE_HEADER.size
+        for _ in range(level_count):
+            if offset + LEVEL_HEADER.size > len(data):
+                return None
+            (pairs,) = LEVEL_HEADER.unpack_from(data, offset)
+            offset += LEVEL_HEADER.size
+            if offset + pairs * 2 > len(data):
+                return None
+            level = array.array('b')
+            level.frombytes(data[offset:offset + pairs * 2])
+            levels.append(level)
+            offset += pairs * 2
+        return cls(levels, bucket_frames, frame_rate, total_frames)
+
+
+class WaveformBuilder:
+    # Collects min/max per bucket from the decoded blocks of a conversion.
+    def __init__(self, source_format, bucket_frames=BASE_BUCKET_FRAMES):
+        self.frame_rate, self.sample_width, self.channels = source_format
+        self.bucket_frames = bucket_frames
+        self.bucket_size = bucket_frames * self.sample_width * self.channels
+        self.scale = 127 / 2 ** (8 * self.sample_width - 1)
+        self.base = array.array('b')
+        self.pending = b""
+        self.total_frames = 0
+
+    def add(self, block):
+        self.total_frames += len(block) // (self.sample_width * self.channels)
+        if self.pending:
+            block = self.pending + block
+        usable = len(block) - len(block) % self.bucket_size
+        for offset in range(0, usable, self.bucket_size):
+            self.add_bucket(block[offset:offset + self.bucket_size])
+        self.pending = block[usable:]
+
+    def add_bucket(self, bucket):
+        # All channels share one envelope
+        low, high = audioop.minmax(bucket, self.sample_width)
+        self.base.append(max(-127, int(low * self.scale)))
+        self.base.append(min(127, int(high * self.scale)))
+
+    def finish(self):
+        if self.pending:
+            frame_size = self.sample_width * self.channels
+            self.add_bucket(self.pending[:len(self.pending) - len(self.pending) % frame_size] or b"\0" * frame_size)
+            self.pending = b""
+        levels = [self.base]
+        while len(levels[-1]) // 2 > MIN_LEVEL_LENGTH:
+            levels.append(merge_level(levels[-1]))
+        return WaveformPyramid(levels, self.bucket_frames, self.frame_rate, self.total_frames)
+
+
+def merge_level(level):
+    # Every pair of buckets becomes one
+    merged = array.array('b')
+    pairs = len(level) // 2
+    for index in range(0, pairs, 2):
+        if index + 1 < pairs:
+            merged.append(min(level[index * 2], level[index * 2 + 2]))
+            merged.append(max(level[index * 2 + 1], level[index * 2 + 3]))
+        else:
+            merged.append(level[index * 2])
+            merged.append(level[index * 2 + 1])
+    return merged
@@ -0,0 +1,178 @@
+import os
+import shutil
+import struct
+import uuid
+
+# Streaming WAV writer. Sample data goes straight to disk and the sizes are
+# patched into the header on close, so memory use does not depend on the
+# length of the output. Outputs past the 4 GB RIFF limit either become RF64
+# (EBU Tech 3306) or are split into numbered RIFF parts.
+
+LARGE_FILE_RF64 = "rf64"
+LARGE_FILE_SPLIT = "split"
+LARGE_FILE_MODES = [LARGE_FILE_RF64, LARGE_FILE_SPLIT]
+
+LARGE_FILE_MODE_NAMES = {
+    LARGE_FILE_RF64: "Switch to RF64",
+    LARGE_FILE_SPLIT: "Split into Numbered Parts",
+}
+
+MAX_RIFF_SIZE = 0xFFFFFFFF
+# A 32-bit size of all ones in an RF64 file means "see the ds64 chunk"
+RF64_SIZE_IN_DS64 = 0xFFFFFFFF
+
+WAVE_FORMAT_PCM = 0x0001
+FMT_CHUNK = struct.Struct("<4sIHHIIHH")
+CHUNK_HEADER = struct.Struct("<4sI")
+# Riff size, data size, sample count, table length
+DS64_BODY = struct.Struct("<QQQI")
+
+# RIFF header, fmt chunk and data chunk header of a plain WAV
+PLAIN_HEADER_SIZE = 12 + FMT_CHUNK.size + CHUNK_HEADER.size
+# The same with a JUNK chunk that can become the ds64 chunk
+RF64_HEADER_SIZE = PLAIN_HEADER_SIZE + CHUNK_HEADER.size + DS64_BODY.size
+
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Probed durations can be off (VBR streams), so an estimate within this
+# factor of the RIFF limit already gets room for a ds64 chunk.
+ESTIMATE_MARGIN = 1.25
+
+
+def needs_ds64_room(expected_data_size):
+    # An unknown size might be anything
+    if expected_data_size is None:
+        return True
+    return (expected_data_size + RF64_HEADER_SIZE) * ESTIMATE_MARGIN > MAX_RIFF_SIZE
+
+
+def part_path(path, number):
+    # "take.wav" -> "take_part01.wav"
+    base, extension = os.path.splitext(path)
+    return f"{base}_part{number:02d}{extension}"
+
+
+class WaveWriter:
+    # Writes to "<path>.<token>.part<n>" files; commit() moves them into place
+    # and returns the final paths, discard() removes them. The token is new for
+    # every writer, so two attempts at the same output (a cluster worker that
+    # was given up on but kept going) never write to the same file.
+    # In RF64 mode the header only reserves a JUNK chunk for the ds64 chunk
+    # when expected_data_size (bytes of sample data, None if unknown) may get
+    # near 4 GB; other outputs get the plain header every reader knows.
+    def __init__(self, path, frame_rate, sample_width, channels, large_file_mode=LARGE_FILE_RF64, max_part_size=None,
+                 expected_data_size=None):
+        self.path = path
+        self.frame_rate = frame_rate
+        self.sample_width = sample_width
+        self.channels = channels
+        self.frame_size = sample_width * channels
+        self.large_file_mode = large_file_mode
+        self.header_size = PLAIN_HEADER_SIZE
+        if large_file_mode == LARGE_FILE_RF64 and needs_ds64_room(expected_data_size):
+            self.header_size = RF64_HEADER_SIZE
+        # Whole frames that still keep a plain RIFF part within 4 GB
+        max_part_size = max_part_size or MAX_RIFF_SIZE + 8
+        max_data_size = max_part_size - self.header_size - 1  # Room for a pad byte
+        self.max_part_data = max_data_size - max_data_size % self.frame_size
+        self.token = uuid.uuid4().hex[:12]
+        self.temp_paths = []
+        self.file = None
+        self.data_size = 0
+        self.closed = False
+        self.open_part()
+
+    def open_part(self):
+        temp_path = f"{self.path}.{self.token}.part{len(self.temp_paths) + 1}"
+        self.file = open(temp_path, "wb", buffering=WRITE_BUFFER_SIZE)
+        self.temp_paths.append(temp_path)
+        self.data_size = 0
+        # Placeholder header; the sizes are filled in by finish_part()
+        self.file.write(b"\0" * self.header_size)
+
+    def writeframesraw(self, data):
+        if self.large_file_mode == LARGE_FILE_SPLIT:
+            while self.data_size + len(data) > self.max_part_data:
+                room = self.max_part_data - self.data_size
+                self.file.write(data[:room])
+                self.data_size += room
+                data = data[room:]
+                self.finish_part()
+                self.open_part()
+        elif self.header_size == PLAIN_HEADER_SIZE and self.data_size + len(data) > self.max_part_data:
+            self.make_ds64_room()
+        self.file.write(data)
+        self.data_size += len(data)
+
+    def make_ds64_room(self):
+        # The output outgrew its estimate: copy what was written so far behind
+        # a header with room for the ds64 chunk. Costs one copy, only then.
+        self.file.close()
+        written_path = self.temp_paths.pop()
+        moved_path = written_path + ".grow"
+        os.replace(written_path, moved_path)
+        data_size = self.data_size
+        try:
+            self.header_size = RF64_HEADER_SIZE
+            self.open_part()
+            with open(moved_path, "rb") as f:
+                f.seek(PLAIN_HEADER_SIZE)
+                shutil.copyfileobj(f, self.file, WRITE_BUFFER_SIZE)
+            self.data_size = data_size
+        finally:
+            os.remove(moved_path)
+
+    def finish_part(self):
+        if self.data_size & 1:
+            self.file.write(b"\0")  # Chunks are padded to an even size
+        file_size = self.file.tell()
+        self.file.seek(0)
+        self.file.write(self.build_header(file_size))
+        self.file.close()
+
+    def build_header(self, file_size):
+        riff_size = file_size - 8
+        fmt = FMT_CHUNK.pack(b"fmt ", 16, WAVE_FORMAT_PCM, self.channels, self.frame_rate,
+                             self.frame_rate * self.frame_size, self.frame_size, self.sample_width * 8)
+        if self.header_size == PLAIN_HEADER_SIZE:
+            return struct.pack("<4sI4s", b"RIFF", riff_size, b"WAVE") + fmt + CHUNK_HEADER.pack(b"data", self.data_size)
+
+        if riff_size <= MAX_RIFF_SIZE:
+            # Small enough for RIFF; the reserved space stays a JUNK chunk
+            return (struct.pack("<4sI4s", b"RIFF", riff_size, b"WAVE")
+                    + CHUNK_HEADER.pack(b"JUNK", DS64_BODY.size) + b"\0" * DS64_BODY.size
+                    + fmt + CHUNK_HEADER.pack(b"data", self.data_size))
+        return (struct.pack("<4sI4s", b"RF64", RF64_SIZE_IN_DS64, b"WAVE")
+                + CHUNK_HEADER.pack(b"ds64", DS64_BODY.size)
+                + DS64_BODY.pack(riff_size, self.data_size, self.data_size // self.frame_size, 0)
+                + fmt + CHUNK_HEADER.pack(b"data", RF64_SIZE_IN_DS64))
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.finish_part()
+
+    def final_paths(self):
+        if len(self.temp_paths) == 1:
+            return [self.path]
+        return [part_path(self.path, number) for number in range(1, len(self.temp_paths) + 1)]
+
+    def commit(self):
+        self.close()
+        final_paths = self.final_paths()
+        for temp_path, final_path in zip(self.temp_paths, final_paths):
+            os.replace(temp_path, final_path)
+        return final_paths
+
+    def discard(self):
+        try:
+            if not self.closed:
+                self.closed = True
+                self.file.close()
+        except OSError:
+            pass
+        for temp_path in self.temp_paths:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
@@ -0,0 +1,55 @@
+import pytest
+
+from mat_cues import Cue, CueError, finish_cues, parse_cue_csv, parse_edl, cue_span
+
+
+def names(cues):
+    return [cue.name for cue in cues]
+
+
+def test_unique_names_are_kept():
+    cues = finish_cues([Cue("a", 0, 1), Cue("b", 1, 2)])
+    assert names(cues) == ["a", "b"]
+
+
+def test_duplicates_get_numbered_suffixes():
+    cues = finish_cues([Cue("a", 0, 1), Cue("a", 1, 2), Cue("a", 2, 3)])
+    assert names(cues) == ["a", "a_2", "a_3"]
+
+
+def test_suffix_skips_names_already_taken():
+    cues = finish_cues([Cue("a", 0, 1), Cue("a_2", 1, 2), Cue("a", 2, 3), Cue("A", 3, 4), Cue("a_3", 4, 5)])
+    assert names(cues) == ["a", "a_2", "a_4", "A_5", "a_3"]
+    assert len({name.lower() for name in names(cues)}) == len(cues)
+
+
+def test_no_cues():
+    with pytest.raises(CueError):
+        finish_cues([])
+
+
+def test_csv_with_header_and_frame_numbers():
+    cues = parse_cue_csv("name,in,out\nintro,0,48\n# skipped\n,48,96\nintro,96,120\n", 24)
+    assert names(cues) == ["intro", "shot_002", "intro_2"]
+    assert [(cue.start, cue.end) for cue in cues] == [(0.0, 2.0), (2.0, 4.0), (4.0, 5.0)]
+    assert cue_span(cues) == (0.0, 5.0)
+
+
+def test_csv_rejects_reversed_range():
+    with pytest.raises(CueError):
+        parse_cue_csv("a,10,5\n", 24)
+
+
+def test_edl_timecode_at_fractional_rate():
+    edl = (
+        "TITLE: REEL\n"
+        "001  AX  AA  C  01:00:00:00 01:30:00:00 00:00:00:00 00:30:00:00\n"
+        "* FROM CLIP NAME: wide.mov\n"
+        "002  AX  AA  C  01:30:00:00 01:30:10:00 00:30:00:00 00:30:10:00\n"
+    )
+    cues = parse_edl(edl, 23.976, "01:00:00:00")
+    assert names(cues) == ["wide_001", "shot_002"]
+    # 30 minutes of timecode is 43200 frames, which is 1801.8 s at 23.976
+    assert cues[0].start == 0.0
+    assert cues[0].end == pytest.approx(43200 / 23.976)
+    assert cues[1].end - cues[1].start == pytest.approx(240 / 23.976)
@@ -0,0 +1,109 @@
+import math
+
+import pytest
+
+from mat_session import write_session, SessionReader, SessionError
+
+
+def make_meta(source_path, **values):
+    meta = {
+        "source_path": source_path,
+        "temp_path": None,
+        "member": None,
+        "size": None,
+        "mtime": None,
+        "duration": None,
+        "frame_rate": None,
+        "sample_width": None,
+        "channels": None,
+        "supports_maya": False,
+        "error": None,
+    }
+    meta.update(values)
+    return meta
+
+
+RECORDS = [
+    {
+        "columns": ["take1.wav", "2024-01-02 10:00 AM", "wav", "1.00 MB", "Yes", "Complete", "OK"],
+        "converted": True,
+        "pinned": True,
+        "output_paths": ["/tmp/out/take1.wav", "/tmp/out/take1_48k.wav"],
+        "clip_range": (1.5, None),
+        "cues": None,
+        "stats": {"integrated": -23.0, "true_peak": -1.5, "sample_peak": -2.0, "clipped_samples": 12, "gain": 3.5},
+        "meta": make_meta("/media/take1.wav", temp_path="/tmp/take1.wav", size=1048576, mtime=1704189600.25,
+                          duration=6.0, frame_rate=44100, sample_width=2, channels=2, supports_maya=True),
+    },
+    {
+        # Silence: nothing measured, peaks at -inf
+        "columns": ["silence.mp3", "N/A", "mp3", "N/A", "No", "N/A", "N/A"],
+        "converted": False,
+        "pinned": False,
+        "output_paths": [],
+        "clip_range": None,
+        "cues": [("intro", 0.0, 2.5), ("verse ü", 2.5, 10.0)],
+        "stats": {"integrated": None, "true_peak": float("-inf"), "sample_peak": float("-inf"),
+                  "clipped_samples": 0, "gain": 0.0},
+        "meta": make_meta("/media/silence.mp3"),
+    },
+    {
+        "columns": ["c.wav", "", "wav", "", "", "", ""],
+        "converted": False,
+        "pinned": False,
+        "output_paths": [],
+        "clip_range": (0.0, 4.0),
+        "cues": None,
+        "stats": None,
+        "meta": make_meta("/media/archive.zip::c.wav", size=0, mtime=0.0),
+    },
+]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "list.matsession")
+    write_session(path, RECORDS)
+    reader = SessionReader(path)
+    try:
+        assert len(reader) == len(RECORDS)
+        for index, expected in enumerate(RECORDS):
+            assert reader.record(index) == expected
+    finally:
+        reader.close()
+
+
+def test_infinite_peaks_stay_infinite(tmp_path):
+    path = str(tmp_path / "list.matsession")
+    write_session(path, RECORDS)
+    reader = SessionReader(path)
+    try:
+        stats = reader.record(1)["stats"]
+    finally:
+        reader.close()
+    assert stats["integrated"] is None
+    assert math.isinf(stats["true_peak"]) and stats["true_peak"] < 0
+
+
+def test_empty_session(tmp_path):
+    path = str(tmp_path / "empty.matsession")
+    write_session(path, [])
+    reader = SessionReader(path)
+    try:
+        assert len(reader) == 0
+    finally:
+        reader.close()
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not-a-session.matsession"
+    path.write_bytes(b"RIFF" + b"\0" * 60)
+    with pytest.raises(SessionError):
+        SessionReader(str(path))
+
+
+def test_rejects_truncated_file(tmp_path):
+    path = tmp_path / "list.matsession"
+    write_session(str(path), RECORDS)
+    path.write_bytes(path.read_bytes()[:100])
+    with pytest.raises(SessionError):
+        SessionReader(str(path))
@@ -0,0 +1,41 @@
+import pytest
+
+from mat_timecode import TimecodeError, parse_range, parse_timecode, format_range
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("90.5", (90.5, None)),
+    ("01:30.5", (90.5, None)),
+    ("00:01:30.500", (90.5, None)),
+    ("10-20", (10.0, 20.0)),
+    ("10 - ", (10.0, None)),
+    ("00:00:10-00:01:00", (10.0, 60.0)),
+    ("100-340@24", (100 / 24, 340 / 24)),
+    ("00:00:01:12-00:00:02:00@24", (1.5, 2.0)),
+])
+def test_range_forms(text, expected):
+    start, end = parse_range(text)
+    assert start == pytest.approx(expected[0])
+    assert end == (None if expected[1] is None else pytest.approx(expected[1]))
+
+
+def test_fps_argument_applies_to_both_sides():
+    assert parse_range("48-96", 24) == (2.0, 4.0)
+
+
+@pytest.mark.parametrize("text", ["", "-10", "20-10", "10-10", "1-2-3", "abc", "00:00:01:30@24", "00:00:01:12"])
+def test_invalid_ranges(text):
+    with pytest.raises(TimecodeError):
+        parse_range(text)
+
+
+def test_timecode_and_frame_number_agree_at_fractional_rates():
+    assert parse_timecode("00:30:00:00", 23.976) == pytest.approx(1801.8, abs=0.01)
+    assert parse_timecode("00:30:00:00", 23.976) == pytest.approx(parse_timecode("43200@23.976"))
+    assert parse_timecode("00:00:01:29", 29.97) == pytest.approx(59 / 29.97)
+
+
+def test_format_range():
+    assert format_range(None) == "Full"
+    assert format_range((90.5, None)) == "00:01:30.500 - End"
+    assert format_range((0.0, 3661.25)) == "00:00:00.000 - 01:01:01.250"
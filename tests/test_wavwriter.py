@@ -0,0 +1,99 @@
+import os
+import struct
+import wave
+
+from mat_loudness import find_data_chunk
+from mat_wavwriter import (WaveWriter, LARGE_FILE_RF64, LARGE_FILE_SPLIT, MAX_RIFF_SIZE, PLAIN_HEADER_SIZE,
+                           RF64_HEADER_SIZE, RF64_SIZE_IN_DS64, DS64_BODY, part_path)
+
+FRAME_RATE = 44100
+SAMPLE_WIDTH = 2
+CHANNELS = 2
+FRAME_SIZE = SAMPLE_WIDTH * CHANNELS
+
+
+def frames(count, start=0):
+    return b"".join(struct.pack("<hh", (start + i) % 30000, -((start + i) % 30000)) for i in range(count))
+
+
+def write(path, blocks, **options):
+    writer = WaveWriter(str(path), FRAME_RATE, SAMPLE_WIDTH, CHANNELS, **options)
+    for block in blocks:
+        writer.writeframesraw(block)
+    return writer.commit()
+
+
+def read_frames(path):
+    with wave.open(str(path), "rb") as w:
+        assert (w.getframerate(), w.getsampwidth(), w.getnchannels()) == (FRAME_RATE, SAMPLE_WIDTH, CHANNELS)
+        return w.readframes(w.getnframes())
+
+
+def test_small_output_gets_plain_header(tmp_path):
+    data = frames(1000)
+    paths = write(tmp_path / "take.wav", [data], expected_data_size=len(data))
+    assert paths == [str(tmp_path / "take.wav")]
+    with open(paths[0], "rb") as f:
+        assert find_data_chunk(f) == (PLAIN_HEADER_SIZE, len(data))
+    assert read_frames(paths[0]) == data
+    assert os.path.getsize(paths[0]) == PLAIN_HEADER_SIZE + len(data)
+
+
+def test_unknown_size_reserves_ds64_room(tmp_path):
+    data = frames(1000)
+    paths = write(tmp_path / "take.wav", [data])
+    with open(paths[0], "rb") as f:
+        assert f.read(4) == b"RIFF"
+        f.seek(12)
+        assert f.read(4) == b"JUNK"
+        assert find_data_chunk(f) == (RF64_HEADER_SIZE, len(data))
+    assert read_frames(paths[0]) == data
+
+
+def test_outgrown_estimate_moves_data_behind_ds64_room(tmp_path):
+    # A small max_part_size stands in for the 4 GB limit
+    blocks = [frames(100, start) for start in range(0, 1000, 100)]
+    paths = write(tmp_path / "take.wav", blocks, expected_data_size=400, max_part_size=2000)
+    with open(paths[0], "rb") as f:
+        f.seek(12)
+        assert f.read(4) == b"JUNK"
+        assert find_data_chunk(f) == (RF64_HEADER_SIZE, 4000)
+    assert read_frames(paths[0]) == b"".join(blocks)
+    assert os.listdir(tmp_path) == ["take.wav"]
+
+
+def test_rf64_header_past_riff_limit(tmp_path):
+    writer = WaveWriter(str(tmp_path / "take.wav"), FRAME_RATE, SAMPLE_WIDTH, CHANNELS)
+    writer.data_size = MAX_RIFF_SIZE + 1000 * FRAME_SIZE
+    header = writer.build_header(RF64_HEADER_SIZE + writer.data_size)
+    writer.discard()
+    assert len(header) == RF64_HEADER_SIZE
+    assert struct.unpack_from("<4sI4s4sI", header) == (b"RF64", RF64_SIZE_IN_DS64, b"WAVE", b"ds64", DS64_BODY.size)
+    riff_size, data_size, sample_count, table_length = DS64_BODY.unpack_from(header, 20)
+    assert riff_size == RF64_HEADER_SIZE + writer.data_size - 8
+    assert data_size == writer.data_size
+    assert sample_count == writer.data_size // FRAME_SIZE
+    assert header[-8:] == struct.pack("<4sI", b"data", RF64_SIZE_IN_DS64)
+
+
+def test_split_parts_stay_within_part_size(tmp_path):
+    data = frames(1000)
+    paths = write(tmp_path / "take.wav", [data[:1234], data[1234:]], large_file_mode=LARGE_FILE_SPLIT,
+                  max_part_size=1000)
+    assert paths == [part_path(str(tmp_path / "take.wav"), number) for number in range(1, len(paths) + 1)]
+    assert len(paths) == 5
+    for path in paths:
+        assert os.path.getsize(path) <= 1000
+        with open(path, "rb") as f:
+            offset, size = find_data_chunk(f)
+        assert offset == PLAIN_HEADER_SIZE and size % FRAME_SIZE == 0
+    assert b"".join(read_frames(path) for path in paths) == data
+
+
+def test_temp_files_are_unique_per_writer_and_discarded(tmp_path):
+    first = WaveWriter(str(tmp_path / "take.wav"), FRAME_RATE, SAMPLE_WIDTH, CHANNELS)
+    second = WaveWriter(str(tmp_path / "take.wav"), FRAME_RATE, SAMPLE_WIDTH, CHANNELS)
+    assert first.temp_paths != second.temp_paths
+    first.discard()
+    second.discard()
+    assert os.listdir(tmp_path) == []